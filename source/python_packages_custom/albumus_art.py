@@ -0,0 +1,176 @@
+import io
+import os
+import base64
+import hashlib
+import time
+import threading
+from functools import cached_property
+from PIL import Image
+from mutagen.flac import Picture
+from mutagen.id3 import APIC
+
+def sniff_image_mime(data):
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8'):
+        return 'image/jpeg'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if data.startswith(b'RIFF') and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'image/png'
+
+# With a gap of 3 Pillow first shrinks by an integer factor with reduce(), which is indistinguishable from a full LANCZOS pass
+RESIZE_REDUCING_GAP = 3.0
+
+def open_image_rgb(path, largest=None):
+    """
+    Decode an image once, already converted to RGB. For JPEG masters `draft` lets the decoder scale down by
+    1/2, 1/4 or 1/8 while staying at least as large as `largest`.
+    """
+    with Image.open(path) as img:
+        if largest:
+            img.draft("RGB", largest)
+        img.load()
+        if img.mode != "RGB":
+            return img.convert("RGB")
+        return img.copy()
+
+def resize_image(img, dimensions):
+    img_resized = img.resize(dimensions, Image.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
+    if img_resized.mode in ("RGBA", "P"):
+        img_resized = img_resized.convert("RGB")
+    return img_resized
+
+def resize_cascade(img, sizes):
+    """
+    Produce every size from the smallest already-rendered image that is still at least as large and has the same
+    aspect ratio, largest target first. Yields (name, image, source size, seconds).
+    """
+    intermediates = [img]
+    for size_name, dimensions in sorted(sizes.items(), key=lambda item: item[1][0] * item[1][1], reverse=True):
+        target_width, target_height = dimensions
+        candidates = [
+            candidate for candidate in intermediates
+            if candidate.width >= target_width and candidate.height >= target_height
+            and candidate.width * target_height == candidate.height * target_width
+        ]
+        source = min(candidates, key=lambda candidate: candidate.width * candidate.height) if candidates else img
+
+        time_start = time.perf_counter()
+        img_resized = resize_image(source, dimensions)
+        seconds = time.perf_counter() - time_start
+
+        intermediates.append(img_resized)
+        yield size_name, img_resized, source.size, seconds
+
+def encode_image(img, image_format, quality):
+    buffer = io.BytesIO()
+    img.save(buffer, image_format, quality=quality)
+    return buffer.getvalue()
+
+def render_embedded_cover(cover_art_path, settings):
+    """
+    Render the cover variant that gets embedded into audio files, stepping the quality down until it fits
+    `max_bytes`. Returns (data, mime, quality); the last attempt is returned if the budget can't be met.
+    """
+    dimensions = tuple(settings.get("size", [600, 600]))
+    image_format = settings.get("image_output_format", "JPEG")
+    quality = settings.get("image_quality", 90)
+    quality_min = settings.get("image_quality_min", 40)
+    max_bytes = settings.get("max_bytes", 0)
+
+    img = open_image_rgb(cover_art_path, dimensions)
+    # Never upscale, a smaller master is embedded at its own size
+    if img.size[0] < dimensions[0] or img.size[1] < dimensions[1]:
+        dimensions = img.size
+    img_resized = resize_image(img, dimensions)
+
+    data = encode_image(img_resized, image_format, quality)
+    while max_bytes and len(data) > max_bytes and quality > quality_min:
+        quality = max(quality - 10, quality_min)
+        data = encode_image(img_resized, image_format, quality)
+
+    return data, Image.MIME.get(image_format.upper(), sniff_image_mime(data)), quality
+
+class CoverArt:
+    """
+    Album cover payload shared by every track and format of an album.
+
+    The image bytes, the FLAC `Picture` block, its base64 form for Ogg and the ID3 `APIC` frame are each
+    built on first use and then reused, so a cover is read and serialized once per album instead of once
+    per output file. With `embed_settings`, a size-limited variant is rendered once and embedded instead of
+    the full-resolution master; it is written to `cache_dir` so ffmpeg can read it as an input.
+    """
+
+    def __init__(self, path, embed_settings=None, cache_dir=None):
+        self.path = path
+        self.embed_settings = embed_settings
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        self.loaded = None
+
+    def __getstate__(self):
+        # Sent to worker processes as its settings only; each process loads the image on first use
+        return {'path': self.path, 'embed_settings': self.embed_settings, 'cache_dir': self.cache_dir}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def load(self):
+        with self.lock:
+            if self.loaded is None:
+                if self.embed_settings:
+                    data, mime, quality = render_embedded_cover(self.path, self.embed_settings)
+                    self.loaded = {'data': data, 'mime': mime, 'quality': quality}
+                else:
+                    with open(self.path, 'rb') as img_file:
+                        data = img_file.read()
+                    self.loaded = {'data': data, 'mime': sniff_image_mime(data), 'quality': None}
+        return self.loaded
+
+    @property
+    def data(self):
+        return self.load()['data']
+
+    @property
+    def mime(self):
+        return self.load()['mime']
+
+    @cached_property
+    def file_path(self):
+        if not self.embed_settings:
+            return self.path
+        data = self.data
+        extension = '.jpg' if self.mime == 'image/jpeg' else '.' + self.mime.split('/')[-1]
+        file_path = os.path.join(self.cache_dir, hashlib.sha256(data).hexdigest() + extension)
+        if not os.path.isfile(file_path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path_temp = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(path_temp, 'wb') as f:
+                f.write(data)
+            os.replace(path_temp, file_path)
+        return file_path
+
+    @cached_property
+    def picture(self):
+        picture = Picture()
+        picture.type = 3  # Cover (front)
+        picture.mime = self.mime
+        picture.desc = 'Cover Art'
+        picture.data = self.data
+        return picture
+
+    @cached_property
+    def picture_b64(self):
+        return base64.b64encode(self.picture.write()).decode('ascii')
+
+    @cached_property
+    def apic(self):
+        return APIC(
+            encoding=3,  # UTF-8
+            mime=self.mime,  # MIME type of the embedded image
+            type=3,  # Front cover
+            desc='Cover Art',
+            data=self.data
+        )
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from albumus_journal import get_temp_path
+
+LOG_TAG_CACHE = "[🗄️ Cache]"
+
+CACHE_INDEX_VERSION = 1
+CACHE_INDEX_FILE_NAME = 'index.json'
+
+def hash_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_key(*parts):
+    """
+    Combine content hashes and settings into a cache key.
+    """
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+def link_or_copy(source_path, dest_path, link=True):
+    """
+    Hardlink `source_path` to `dest_path`, falling back to a copy across devices or on filesystems without links.
+    The result is renamed over `dest_path`, so an existing file (or hardlink) is replaced, never written through.
+    Returns 'link' or 'copy'.
+    """
+    # rename() between two links to the same inode is a no-op, so an existing link is kept as it is
+    if link and os.path.isfile(dest_path) and os.path.samefile(source_path, dest_path):
+        return 'link'
+    path_temp = get_temp_path(dest_path)
+    if os.path.lexists(path_temp):
+        os.remove(path_temp)
+    method = 'copy'
+    if link:
+        try:
+            os.link(source_path, path_temp)
+            method = 'link'
+        except OSError:
+            pass
+    if method == 'copy':
+        shutil.copyfile(source_path, path_temp)
+    os.replace(path_temp, dest_path)
+    return method
+
+class ContentCache:
+    """
+    Content-addressed file cache with a size cap and least-recently-used eviction.
+
+    Each key maps to a single stored file. The index records size and last use per entry and is written on
+    `save`, which is also when entries are evicted down to `max_bytes`. Thread-safe within one process; entries
+    other processes saved to the index in the meantime are merged in on `save`.
+    """
+
+    def __init__(self, cache_dir, logger, max_bytes=0, name='cache'):
+        self.cache_dir = cache_dir
+        self.logger = logger
+        self.max_bytes = max_bytes
+        self.name = name
+        self.path_index = os.path.join(cache_dir, CACHE_INDEX_FILE_NAME)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.count_hit = 0
+        self.count_miss = 0
+        self.count_stored = 0
+        self.count_evicted = 0
+        self.load()
+
+    def file_name(self, key, extension=''):
+        return f"{key[:2]}/{key}{extension}"
+
+    def read_index(self):
+        if not os.path.isfile(self.path_index):
+            return {}
+        try:
+            with open(self.path_index, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_INDEX_VERSION:
+                return data.get('entries', {})
+        except Exception as e:
+            self.logger.log("warn", LOG_TAG_CACHE, f"Failed to load {self.name} cache index:", {"Path": self.path_index, "Error": str(e)})
+        return {}
+
+    def load(self):
+        self.entries = self.read_index()
+
+    def merge_index(self):
+        """
+        Take in entries stored by other processes since this one loaded the index, or used by them more recently.
+        """
+        entries = self.read_index()
+        with self.lock:
+            for key, entry in entries.items():
+                current = self.entries.get(key)
+                if current and current['last_used'] >= entry.get('last_used', 0):
+                    continue
+                if os.path.isfile(os.path.join(self.cache_dir, entry['file'])):
+                    self.entries[key] = entry
+
+    def get(self, key):
+        """
+        Return the stored file path for `key` and mark it as used, or None on a miss.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            path_cached = os.path.join(self.cache_dir, entry['file']) if entry else None
+            if entry and os.path.isfile(path_cached):
+                entry['last_used'] = time.time()
+                self.count_hit += 1
+                return path_cached
+            if entry:
+                del self.entries[key]
+            self.count_miss += 1
+        return None
+
+    def put(self, key, source_path, extension=''):
+        """
+        Copy `source_path` into the cache under `key`. Returns the stored path, or None if storing failed.
+        """
+        file_name = self.file_name(key, extension)
+        path_cached = os.path.join(self.cache_dir, file_name)
+        try:
+            os.makedirs(os.path.dirname(path_cached), exist_ok=True)
+            path_temp = f"{path_cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(source_path, path_temp)
+            os.replace(path_temp, path_cached)
+        except Exception as e:
+            self.logger.log("warn", LOG_TAG_CACHE, f"Failed to store {self.name} cache entry:", {"Key": key, "Error": str(e)})
+            return None
+
+        with self.lock:
+            self.entries[key] = {'file': file_name, 'size': os.path.getsize(path_cached), 'last_used': time.time()}
+            self.count_stored += 1
+        return path_cached
+
+    def evict(self):
+        if not self.max_bytes:
+            return 0
+        evicted = 0
+        with self.lock:
+            total = sum(entry['size'] for entry in self.entries.values())
+            for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, entry['file']))
+                except OSError:
+                    pass
+                total -= entry['size']
+                del self.entries[key]
+                evicted += 1
+            self.count_evicted += evicted
+        return evicted
+
+    def save(self):
+        self.merge_index()
+        self.evict()
+        path_temp = self.path_index + '.tmp'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with self.lock:
+                with open(path_temp, 'w', encoding='utf-8') as f:
+                    json.dump({'version': CACHE_INDEX_VERSION, 'entries': self.entries}, f, indent=1, sort_keys=True)
+            os.replace(path_temp, self.path_index)
+            self.logger.log("debug", LOG_TAG_CACHE, f"Saved {self.name} cache:", self.stats())
+        except Exception as e:
+            self.logger.log("error", LOG_TAG_CACHE, f"Failed to save {self.name} cache index:", {"Path": self.path_index, "Error": str(e)})
+
+    def stats(self, counts=True):
+        """
+        Size of the cache and, with `counts`, this process's hit/miss/store/evict counters (not persisted).
+        """
+        with self.lock:
+            size = sum(entry['size'] for entry in self.entries.values())
+            stats = {
+                "Entries": len(self.entries),
+                "Megabytes": round(size / (1024 * 1024), 2),
+                "Max Megabytes": round(self.max_bytes / (1024 * 1024), 2) if self.max_bytes else "unlimited"
+            }
+            if counts:
+                stats.update({"Hits": self.count_hit, "Misses": self.count_miss, "Stored": self.count_stored, "Evicted": self.count_evicted})
+            return stats
@@ -0,0 +1,95 @@
+import os
+import json
+import threading
+
+LOG_TAG_COST = "[⏱️ Cost]"
+
+COST_MODEL_VERSION = 1
+
+# Seconds of work per second of audio until real encodes have been observed; only their ratios matter at first
+DEFAULT_RATES = {
+    'flac': 0.02,
+    'mp3': 0.03,
+    'ogg': 0.04,
+    'wav': 0.005,
+    'art': 1.0
+}
+DEFAULT_RATE = 0.03
+# Weight of the newest observation in the moving average
+SMOOTHING = 0.3
+
+class CostModel:
+    """
+    Learns how long each kind of job takes, per format in seconds per second of audio, as an exponential moving
+    average of observed run times. Estimates are only used to order jobs, so rough values are fine.
+    Album art is modelled per job. Thread-safe; persisted between runs. On save, kinds this process hasn't
+    observed keep the rates other processes saved.
+    """
+
+    def __init__(self, path, logger):
+        self.path = path
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.rates = dict(DEFAULT_RATES)
+        self.samples = {}
+        self.observed = set()
+        self.load()
+
+    def read(self):
+        if not os.path.isfile(self.path):
+            return {}, {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == COST_MODEL_VERSION:
+                return data.get('rates', {}), data.get('samples', {})
+        except Exception as e:
+            self.logger.log("warn", LOG_TAG_COST, "Failed to load cost model:", {"Path": self.path, "Error": str(e)})
+        return {}, {}
+
+    def load(self):
+        rates, self.samples = self.read()
+        self.rates.update(rates)
+
+    def estimate(self, kind, units):
+        """
+        Estimated seconds for `units` (seconds of audio, or jobs for art) of `kind`.
+        """
+        with self.lock:
+            return self.rates.get(kind, DEFAULT_RATE) * (units or 0)
+
+    def observe(self, kinds, units, seconds):
+        """
+        Record that encoding `units` of every format in `kinds` took `seconds` in total. A shared run (one ffmpeg
+        command for several formats) is split between them in proportion to their current estimates.
+        """
+        if not kinds or not units or units <= 0 or seconds <= 0:
+            return
+        with self.lock:
+            total = sum(self.rates.get(kind, DEFAULT_RATE) for kind in kinds)
+            for kind in kinds:
+                share = self.rates.get(kind, DEFAULT_RATE) / total if total else 1 / len(kinds)
+                rate = seconds * share / units
+                if self.samples.get(kind):
+                    rate = SMOOTHING * rate + (1 - SMOOTHING) * self.rates.get(kind, DEFAULT_RATE)
+                self.rates[kind] = rate
+                self.samples[kind] = self.samples.get(kind, 0) + 1
+                self.observed.add(kind)
+
+    def save(self):
+        path_temp = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            rates_saved, samples_saved = self.read()
+            with self.lock:
+                for kind, rate in rates_saved.items():
+                    if kind not in self.observed:
+                        self.rates[kind] = rate
+                        self.samples[kind] = samples_saved.get(kind, 0)
+                with open(path_temp, 'w', encoding='utf-8') as f:
+                    json.dump({'version': COST_MODEL_VERSION, 'rates': self.rates, 'samples': self.samples}, f, indent=1, sort_keys=True)
+                rates = {kind: round(rate, 4) for kind, rate in self.rates.items()}
+            os.replace(path_temp, self.path)
+            self.logger.log("debug", LOG_TAG_COST, "Saved cost model:", rates)
+        except Exception as e:
+            self.logger.log("error", LOG_TAG_COST, "Failed to save cost model:", {"Path": self.path, "Error": str(e)})
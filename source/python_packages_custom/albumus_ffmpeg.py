@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import concurrent.futures
+from collections import namedtuple
+from cure_log import getLogJob, setLogJob
+
+LOG_TAG_PROCESS = "[⚙️ Process]"
+
+# Return codes of `ProcessRunner.run` that don't come from the child itself
+RETURN_SPAWN_FAILED = 1
+RETURN_TIMEOUT = 124
+RETURN_INTERRUPTED = 130
+
+# Seconds to wait for a killed child to be reaped before giving up on it
+KILL_WAIT_SECONDS = 5
+STREAM_LINE_LIMIT = 1024 * 1024
+
+ProcessResult = namedtuple('ProcessResult', ['returncode', 'stdout', 'stderr'])
+
+# Arguments that make ffmpeg write machine-readable progress to stdout instead of its status line on stderr
+FFMPEG_PROGRESS_ARGS = ['-hide_banner', '-nostats', '-progress', 'pipe:1']
+
+def parse_progress_number(value, suffix=''):
+    value = (value or '').strip()
+    if suffix and value.endswith(suffix):
+        value = value[:-len(suffix)]
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+class ProgressParser:
+    """
+    Parses the key=value blocks ffmpeg writes with `-progress`. Each block ends with a `progress` key
+    (`continue` or `end`), at which point `on_event` is called with out_time (seconds), speed (multiple of
+    real time), bitrate (kbit/s), total_size (bytes) and progress. Values ffmpeg reports as N/A are None.
+    """
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+        self.fields = {}
+
+    def feed(self, line):
+        key, separator, value = line.partition('=')
+        if not separator:
+            return
+        key = key.strip()
+        self.fields[key] = value.strip()
+        if key != 'progress':
+            return
+
+        fields = self.fields
+        self.fields = {}
+        # out_time_us and the misnamed out_time_ms are both microseconds
+        out_time_us = parse_progress_number(fields.get('out_time_us') or fields.get('out_time_ms'))
+        total_size = parse_progress_number(fields.get('total_size'))
+        self.on_event({
+            'out_time': out_time_us / 1000000 if out_time_us is not None else None,
+            'speed': parse_progress_number(fields.get('speed'), 'x'),
+            'bitrate': parse_progress_number(fields.get('bitrate'), 'kbits/s'),
+            'total_size': int(total_size) if total_size is not None else None,
+            'progress': fields['progress']
+        })
+
+class ProcessRunner:
+    """
+    Runs child processes (ffmpeg, ffprobe) from a single asyncio event loop on a background thread.
+
+    `run` is called from worker threads and blocks until its child exits, so any number of children can be
+    driven concurrently without a reader thread each. Output is streamed line by line to `on_line` and/or
+    collected. A child that exceeds its timeout, or whose caller is interrupted, is killed and reaped before
+    `run` returns; `cancel_all` does the same for every running child.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(target=self.loop.run_forever, name="albumus-process-loop", daemon=True)
+                self.thread.start()
+        return self.loop
+
+    def close(self):
+        with self.lock:
+            if self.loop is None:
+                return
+            self.cancel_all(wait=True)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(KILL_WAIT_SECONDS)
+            if not self.thread.is_alive():
+                self.loop.close()
+            self.loop = None
+            self.thread = None
+
+    def cancel_all(self, wait=False):
+        """
+        Cancel every running child; with `wait`, block until they have been killed and reaped.
+        """
+        if self.loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self.cancel_tasks(), self.loop)
+        if wait:
+            try:
+                future.result(KILL_WAIT_SECONDS * 2)
+            except concurrent.futures.TimeoutError:
+                self.logger.log("warn", LOG_TAG_PROCESS, "Timed out waiting for cancelled processes.")
+
+    async def cancel_tasks(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run(self, command_args, timeout=None, on_line=None, capture=False, merge_stderr=True):
+        """
+        Run `command_args` and wait for it to exit. Returns a `ProcessResult`; stdout (and stderr when it isn't
+        merged into stdout) are collected as text when `capture` is set, otherwise they are None. Lines handed to
+        `on_line` are not collected as well, so with both only stderr is kept.
+
+        The return code is the child's, or RETURN_SPAWN_FAILED (1), RETURN_TIMEOUT (124) or RETURN_INTERRUPTED (130).
+        """
+        loop = self.start()
+        finished = threading.Event()
+        if on_line:
+            # Lines are handled on the loop thread; log them under the caller's job
+            on_line = self.with_log_job(on_line, getLogJob())
+        future = asyncio.run_coroutine_threadsafe(
+            self.run_async(command_args, timeout, on_line, capture, merge_stderr, finished), loop
+        )
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            finished.wait(KILL_WAIT_SECONDS)
+            return ProcessResult(RETURN_INTERRUPTED, None, None)
+        except concurrent.futures.CancelledError:
+            # Cancelled through cancel_all, the child has already been killed
+            return ProcessResult(RETURN_INTERRUPTED, None, None)
+
+    def with_log_job(self, on_line, job_id):
+        def handle_line(line):
+            setLogJob(job_id)
+            on_line(line)
+        return handle_line
+
+    async def run_async(self, command_args, timeout, on_line, capture, merge_stderr, finished):
+        try:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command_args,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT if merge_stderr else asyncio.subprocess.PIPE,
+                    limit=STREAM_LINE_LIMIT
+                )
+            except Exception as e:
+                self.logger.log("error", LOG_TAG_PROCESS, "Failed to start process:", {"Command": command_args[0], "Error": str(e)})
+                return ProcessResult(RETURN_SPAWN_FAILED, None, None)
+
+            stdout = [] if capture and not on_line else None
+            stderr = [] if capture and not merge_stderr else None
+            readers = [self.read_stream(process.stdout, on_line, stdout)]
+            if not merge_stderr:
+                readers.append(self.read_stream(process.stderr, None, stderr))
+
+            try:
+                await asyncio.wait_for(asyncio.gather(*readers, process.wait()), timeout)
+            except asyncio.TimeoutError:
+                await self.kill(process)
+                self.logger.log("error", LOG_TAG_PROCESS, "Process timed out and was killed:", {"Command": command_args[0], "Timeout Seconds": timeout})
+                return ProcessResult(RETURN_TIMEOUT, None, None)
+            except asyncio.CancelledError:
+                await self.kill(process)
+                raise
+
+            return ProcessResult(
+                process.returncode,
+                ''.join(stdout) if stdout is not None else None,
+                ''.join(stderr) if stderr is not None else None
+            )
+        finally:
+            finished.set()
+
+    async def read_stream(self, stream, on_line, collected):
+        async for line in stream:
+            text = line.decode('utf-8', errors='replace')
+            if collected is not None:
+                collected.append(text)
+            if on_line:
+                on_line(text.rstrip('\r\n'))
+
+    async def kill(self, process):
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        try:
+            await asyncio.wait_for(process.wait(), KILL_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            self.logger.log("warn", LOG_TAG_PROCESS, "Killed process did not exit:", {"PID": process.pid})
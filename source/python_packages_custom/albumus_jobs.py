@@ -0,0 +1,177 @@
+import os
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from cure_log import setLogJob, logSpan, getLogSpan
+
+LOG_TAG_JOBS = "[🧵 Jobs]"
+
+def resolve_worker_count(value):
+    """
+    Resolve a configured worker count, falling back to the number of CPUs for 0, null or invalid values.
+    """
+    try:
+        count = int(value or 0)
+    except (TypeError, ValueError):
+        count = 0
+    return count if count > 0 else (os.cpu_count() or 1)
+
+EXECUTORS = ('thread', 'process')
+
+def get_failed_codes(result):
+    """
+    Nonzero exit codes in a job result. Jobs that run commands (such as encodes) return {name: code} rather than raise;
+    jobs that produce a single file (text copies, renames) return its path, or None when they failed.
+    """
+    if result is None:
+        return {"result": None}
+    if not isinstance(result, dict):
+        return {}
+    return {name: code for name, code in result.items() if type(code) is int and code != 0}
+
+def run_job(job_id, func, args, kwargs, span=None):
+    # Records logged while the job runs carry its id (shown for records forwarded from worker processes)
+    setLogJob(job_id)
+    try:
+        name, parent, cost = span or (f"Job {job_id}", None, 0)
+        with logSpan(name, 'job', parent, Job=job_id, Cost=round(cost, 3)):
+            return func(*args, **kwargs)
+    finally:
+        setLogJob(None)
+
+class Job:
+    def __init__(self, name, func, args=(), kwargs=None, on_done=None, cost=0, slots=1, id=None, span=None):
+        self.id = id
+        self.span = span
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.on_done = on_done
+        self.cost = cost or 0
+        self.slots = slots
+        self.time_start = None
+
+class JobScheduler:
+    """
+    Runs independent jobs on a bounded thread pool.
+
+    Jobs start in order of decreasing estimated `cost` (longest first), so long encodes don't end up running
+    alone at the end of a batch. Jobs are dispatched from the calling thread, so `on_done` callbacks always
+    run there and may touch shared state without locking. A job that raises, or returns nonzero exit codes (see
+    `get_failed_codes`), is logged and counted as failed; its siblings keep running.
+
+    Each job also takes a number of CPU `slots` (the threads it keeps busy). Running jobs never use more than
+    `cpu_budget` slots in total. When the next job doesn't fit, it keeps its place: slots are reserved for it from
+    the time enough running jobs are expected to finish, and only later jobs that end before then (or fit beside
+    it) are started meanwhile, so a wide job isn't held back until every narrow one has run.
+
+    With the 'process' executor, jobs run in spawned worker processes set up by `initializer`; their functions
+    and arguments must be picklable, and results come back to the calling thread as usual.
+    """
+
+    def __init__(self, logger, workers, cpu_budget=None, executor='thread', initializer=None, initargs=()):
+        self.logger = logger
+        self.workers = resolve_worker_count(workers)
+        self.cpu_budget = resolve_worker_count(cpu_budget)
+        self.executor = executor if executor in EXECUTORS else 'thread'
+        self.initializer = initializer
+        self.initargs = initargs
+        self.jobs = []
+        self.count_added = 0
+
+    def add(self, name, func, *args, on_done=None, cost=0, slots=1, **kwargs):
+        self.count_added += 1
+        # A job wider than the whole budget still runs, alone; its trace span nests under the span it was queued in
+        job = Job(name, func, args, kwargs, on_done, cost, min(max(int(slots), 1), self.cpu_budget), self.count_added, getLogSpan())
+        self.jobs.append(job)
+        return job
+
+    def create_executor(self):
+        if self.executor == 'process':
+            return ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=self.initializer, initargs=self.initargs
+            )
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="albumus-job")
+
+    def get_reservation(self, job, slots_free, running):
+        """
+        When `job` is expected to fit, from the estimated end of running jobs, and the slots left spare beside it then.
+        """
+        time_reserved = time.perf_counter()
+        for job_running in sorted(running, key=lambda job_running: job_running.time_start + job_running.cost):
+            if slots_free >= job.slots:
+                break
+            slots_free += job_running.slots
+            time_reserved = max(time_reserved, job_running.time_start + job_running.cost)
+        return time_reserved, slots_free - job.slots
+
+    def take_next(self, pending, slots_free, running):
+        if pending[0].slots <= slots_free:
+            return pending.popleft()
+        time_reserved, slots_spare = self.get_reservation(pending[0], slots_free, running)
+        time_now = time.perf_counter()
+        for index, job in enumerate(pending):
+            if job.slots <= slots_free and (time_now + job.cost <= time_reserved or job.slots <= slots_spare):
+                del pending[index]
+                return job
+        return None
+
+    def run(self):
+        with logSpan('jobs', 'jobs'):
+            return self.run_jobs()
+
+    def run_jobs(self):
+        # Stable sort, so jobs without an estimate keep the order they were added in
+        pending = deque(sorted(self.jobs, key=lambda job: job.cost, reverse=True))
+        self.jobs = []
+        running = {}
+        summary = {"Jobs": len(pending), "Succeeded": 0, "Failed": 0}
+        failed = []
+        time_start = time.perf_counter()
+
+        slots_used = 0
+
+        self.logger.log("info", LOG_TAG_JOBS, "Running jobs:", {"Jobs": len(pending), "Workers": self.workers, "Executor": self.executor, "CPU Budget": self.cpu_budget, "Estimated Seconds": round(sum(job.cost for job in pending), 1)})
+
+        executor = self.create_executor()
+        try:
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    job = self.take_next(pending, self.cpu_budget - slots_used, running.values())
+                    if job is None:
+                        break
+                    slots_used += job.slots
+                    job.time_start = time.perf_counter()
+                    running[executor.submit(run_job, job.id, job.func, job.args, job.kwargs, (job.name, job.span, job.cost))] = job
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    slots_used -= job.slots
+                    try:
+                        result = future.result()
+                        if job.on_done:
+                            job.on_done(result)
+                        failed_codes = get_failed_codes(result)
+                        if failed_codes:
+                            failed.append(job.name)
+                            self.logger.log("error", LOG_TAG_JOBS, "Job failed:", {"Job": job.name, "Id": job.id, "Codes": failed_codes})
+                        else:
+                            summary["Succeeded"] += 1
+                    except Exception as e:
+                        failed.append(job.name)
+                        self.logger.log("error", LOG_TAG_JOBS, "Job failed:", {"Job": job.name, "Id": job.id, "Error": str(e)})
+        except KeyboardInterrupt:
+            self.logger.log("notice", LOG_TAG_JOBS, "Interrupted, cancelling pending jobs:", {"Pending": len(pending), "Running": len(running)})
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+
+        summary["Failed"] = len(failed)
+        if failed:
+            summary["Failed Jobs"] = failed
+        summary["Seconds"] = round(time.perf_counter() - time_start, 3)
+        return summary
@@ -0,0 +1,85 @@
+import os
+import json
+
+LOG_TAG_JOURNAL = "[📓 Journal]"
+
+JOURNAL_FILE_NAME = '.albumus_journal.jsonl'
+TEMP_FILE_PREFIX = '.albumus-tmp.'
+
+def get_temp_path(path):
+    """
+    Temporary name next to `path` that keeps its extension, so ffmpeg still picks the right muxer.
+    """
+    directory, name = os.path.split(path)
+    return os.path.join(directory, TEMP_FILE_PREFIX + name)
+
+def remove_temp_files(base_dir):
+    """
+    Delete temporary outputs left behind by an interrupted run. Returns the number of files removed.
+    """
+    removed = 0
+    for directory, _, files in os.walk(base_dir):
+        for name in files:
+            if name.startswith(TEMP_FILE_PREFIX):
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except OSError:
+                    pass
+    return removed
+
+class BuildJournal:
+    """
+    Append-only record of artifacts completed during a run, one JSON object per line.
+
+    Each line is flushed as soon as it is written, so the journal survives a crash that prevents the manifest
+    from being saved. It is removed once the manifest has been saved.
+    """
+
+    def __init__(self, path, logger):
+        self.path = path
+        self.logger = logger
+        self.file = None
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    def read(self):
+        """
+        Return the (key, entry) pairs recorded so far; a line cut short by a crash, or otherwise malformed, is ignored.
+        """
+        records = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(record, dict) and isinstance(record.get('key'), str) and isinstance(record.get('entry'), dict):
+                        records.append((record['key'], record['entry']))
+        except Exception as e:
+            self.logger.log("warn", LOG_TAG_JOURNAL, "Failed to read journal:", {"Path": self.path, "Error": str(e)})
+        return records
+
+    def open(self, append=False):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+
+    def append(self, key, entry):
+        if self.file is None:
+            self.open(append=True)
+        self.file.write(json.dumps({'key': key, 'entry': entry}, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
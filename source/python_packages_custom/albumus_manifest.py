@@ -0,0 +1,133 @@
+import os
+import json
+import hashlib
+from albumus_journal import BuildJournal, JOURNAL_FILE_NAME
+
+LOG_TAG_MANIFEST = "[📋 Manifest]"
+
+MANIFEST_FILE_NAME = '.albumus_manifest.json'
+MANIFEST_VERSION = 1
+
+def fingerprint_file(path):
+    """
+    Cheap file fingerprint from size and modification time; None if the file is missing.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def fingerprint_value(value):
+    """
+    Stable hash of any JSON-serializable value (metadata entries, config sections, codec arguments).
+    """
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+class BuildManifest:
+    """
+    Records, for every artifact under `out/`, the fingerprints of the inputs it was built from.
+
+    Only artifacts that were confirmed current or rebuilt during this run are kept on save, so entries for
+    removed tracks or failed jobs drop out and get rebuilt next time. Entries may also name the source and
+    format they were built from, so an output can be found again after its file name changed.
+
+    Every record is also appended to a journal. With `resume`, a journal left by a run that stopped before
+    saving is merged in, so its completed artifacts count as built; otherwise it is discarded.
+    """
+
+    def __init__(self, output_base_dir, logger, enabled=True, resume=False):
+        self.output_base_dir = output_base_dir
+        self.path = os.path.join(output_base_dir, MANIFEST_FILE_NAME)
+        self.logger = logger
+        self.enabled = enabled
+        self.resume = resume
+        self.journal = BuildJournal(os.path.join(output_base_dir, JOURNAL_FILE_NAME), logger)
+        self.entries_previous = {}
+        self.previous_by_source = {}
+        self.entries = {}
+        self.count_skipped = 0
+        self.count_recorded = 0
+        self.load()
+        self.load_journal()
+
+    def key(self, artifact_path):
+        return os.path.relpath(artifact_path, self.output_base_dir).replace(os.sep, '/')
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                for key, entry in data.get('entries', {}).items():
+                    self.add_previous(key, entry)
+            else:
+                self.logger.log("notice", LOG_TAG_MANIFEST, "Manifest version changed, rebuilding everything:", {"path": self.path})
+        except Exception as e:
+            self.logger.log("warn", LOG_TAG_MANIFEST, "Failed to load manifest, rebuilding everything:", {"Path": self.path, "Error": str(e)})
+
+    def get(self, artifact_path):
+        return self.entries_previous.get(self.key(artifact_path))
+
+    def load_journal(self):
+        if not self.journal.exists():
+            return
+        if not self.resume:
+            self.logger.log("notice", LOG_TAG_MANIFEST, "Discarding journal of an interrupted run, pass --resume to keep its outputs:", {"path": self.journal.path})
+            self.journal.remove()
+            return
+        records = self.journal.read()
+        for key, entry in records:
+            self.add_previous(key, entry)
+        self.journal.open(append=True)
+        self.logger.log("info", LOG_TAG_MANIFEST, "Resuming from journal:", {"Artifacts": len(records)})
+
+    def add_previous(self, key, entry):
+        self.entries_previous[key] = entry
+        if entry.get('source'):
+            self.previous_by_source[(entry['source'], entry.get('format'))] = key
+
+    def find_previous(self, source_path, fmt):
+        """
+        Return (artifact path, entry) of the previous build of `source_path` in `fmt`, or (None, None).
+        """
+        key = self.previous_by_source.get((self.key(source_path), fmt)) if self.enabled else None
+        if key is None:
+            return None, None
+        return os.path.join(self.output_base_dir, *key.split('/')), self.entries_previous[key]
+
+    def is_current(self, artifact_path, inputs):
+        if not self.enabled:
+            return False
+        key = self.key(artifact_path)
+        entry = self.entries_previous.get(key)
+        if not entry or entry.get('inputs') != inputs or not os.path.isfile(artifact_path):
+            return False
+        self.entries[key] = entry
+        self.count_skipped += 1
+        return True
+
+    def record(self, artifact_path, inputs, source_path=None, fmt=None, **details):
+        entry = {'inputs': inputs, **details}
+        if source_path:
+            entry['source'] = self.key(source_path)
+            entry['format'] = fmt
+        key = self.key(artifact_path)
+        self.entries[key] = entry
+        self.journal.append(key, entry)
+        self.count_recorded += 1
+
+    def save(self):
+        os.makedirs(self.output_base_dir, exist_ok=True)
+        path_temp = self.path + '.tmp'
+        try:
+            with open(path_temp, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, indent=1, sort_keys=True)
+            os.replace(path_temp, self.path)
+            self.journal.remove()
+            self.logger.log("info", LOG_TAG_MANIFEST, "Saved manifest:", {"Artifacts": len(self.entries), "Up To Date": self.count_skipped, "Built": self.count_recorded})
+        except Exception as e:
+            self.logger.log("error", LOG_TAG_MANIFEST, "Failed to save manifest:", {"Path": self.path, "Error": str(e)})
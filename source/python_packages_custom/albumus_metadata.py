@@ -0,0 +1,35 @@
+import os
+import json
+import threading
+
+class MetadataCache:
+    """
+    Parses each metadata JSON file once and reuses it until the file's mtime or size changes.
+
+    Artist files are keyed by path, so one parse is shared by every album of that artist. Track files are
+    JSON objects keyed by filename, which already gives a direct per-track index once parsed.
+    Cached data is shared; callers must copy before mutating.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.count_parsed = 0
+
+    def load(self, path):
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] == signature:
+                return entry[1]
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        with self.lock:
+            self.entries[key] = (signature, data)
+            self.count_parsed += 1
+        return data
@@ -0,0 +1,189 @@
+import os
+import json
+import threading
+import mutagen
+from mutagen.mp3 import BitrateMode
+
+LOG_TAG_PROBE = "[🔎 Probe]"
+
+PROBE_CACHE_VERSION = 2
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+MUTAGEN_CODECS = {
+    'FLAC': 'flac',
+    'MP3': 'mp3',
+    'OggVorbis': 'vorbis',
+    'OggOpus': 'opus',
+    'OggFLAC': 'flac'
+}
+
+def get_wave_codec(info):
+    # Match ffprobe's codec_name for the common PCM layouts
+    bits = getattr(info, 'bits_per_sample', 0)
+    if getattr(info, 'audio_format', 1) == 3:
+        return f'pcm_f{bits}le'
+    return 'pcm_u8' if bits == 8 else f'pcm_s{bits}le'
+
+def get_mp3_bitrate(info):
+    # mutagen derives the bitrate from the Xing/LAME frame count and length (319999 for a 320k file); for CBR
+    # the frame header bitrate is a whole kbps, which is what ffprobe reports and what encode settings use
+    bit_rate = parse_int(getattr(info, 'bitrate', None))
+    if bit_rate and getattr(info, 'bitrate_mode', None) not in (BitrateMode.VBR, BitrateMode.ABR):
+        return round(bit_rate / 1000) * 1000
+    return bit_rate
+
+def probe_mutagen(input_file):
+    """
+    Read stream facts in-process from the container headers mutagen already parses.
+    Returns None when mutagen cannot read the file, so the caller can fall back to ffprobe.
+    """
+    try:
+        audio = mutagen.File(input_file)
+    except Exception:
+        return None
+    if audio is None or audio.info is None:
+        return None
+
+    kind = type(audio).__name__
+    info = audio.info
+    codec = get_wave_codec(info) if kind == 'WAVE' else MUTAGEN_CODECS.get(kind)
+    if codec is None:
+        return None
+
+    # FLAC has no nominal stream bitrate (ffprobe reports N/A), keep it unset so encode settings match the ffprobe path
+    if codec == 'flac':
+        bit_rate = None
+    elif codec == 'mp3':
+        bit_rate = get_mp3_bitrate(info) or None
+    else:
+        bit_rate = parse_int(getattr(info, 'bitrate', None)) or None
+
+    return {
+        'bit_rate': bit_rate,
+        'codec': codec,
+        'sample_rate': parse_int(getattr(info, 'sample_rate', None)),
+        'channels': parse_int(getattr(info, 'channels', None)),
+        'duration': parse_float(getattr(info, 'length', None))
+    }
+
+def probe_ffprobe(input_file, runner, timeout=None):
+    """
+    Read stream facts for the first audio stream with ffprobe, run through `runner` (a ProcessRunner).
+    Returns a dict with bit_rate, codec, sample_rate, channels and duration; missing facts are None.
+    Returns None when ffprobe found no audio stream or its output couldn't be read, so nothing is cached.
+    Raises RuntimeError when ffprobe failed, timed out (124) or was interrupted (130).
+    """
+    result = runner.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'a:0', '-show_entries', 'stream=codec_name,sample_rate,channels,bit_rate,duration', '-of', 'json', input_file],
+        timeout=timeout,
+        capture=True,
+        merge_stderr=False
+    )
+    if result.returncode != 0:
+        stderr = (result.stderr or '').strip()
+        raise RuntimeError(f"ffprobe exited with code {result.returncode}" + (f": {stderr}" if stderr else ''))
+    try:
+        streams = json.loads(result.stdout or '{}').get('streams')
+    except json.JSONDecodeError:
+        return None
+    if not streams:
+        return None
+    stream = streams[0]
+
+    return {
+        'bit_rate': parse_int(stream.get('bit_rate')),
+        'codec': stream.get('codec_name'),
+        'sample_rate': parse_int(stream.get('sample_rate')),
+        'channels': parse_int(stream.get('channels')),
+        'duration': parse_float(stream.get('duration'))
+    }
+
+class ProbeCache:
+    """
+    Persistent stream facts keyed by (path, size, mtime_ns), so unchanged sources are never probed twice.
+    Thread-safe; entries for files that no longer exist are evicted on save, and entries other processes saved
+    in the meantime are merged in.
+    """
+
+    def __init__(self, path, logger):
+        self.path = path
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.count_hit = 0
+        self.count_miss = 0
+        self.load()
+
+    def key(self, input_file):
+        return os.path.normcase(os.path.abspath(input_file))
+
+    def read_entries(self):
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == PROBE_CACHE_VERSION:
+                return data.get('entries', {})
+        except Exception as e:
+            self.logger.log("warn", LOG_TAG_PROBE, "Failed to load probe cache:", {"Path": self.path, "Error": str(e)})
+        return {}
+
+    def load(self):
+        self.entries = self.read_entries()
+
+    def get(self, input_file):
+        try:
+            stat = os.stat(input_file)
+        except OSError:
+            return None
+        with self.lock:
+            entry = self.entries.get(self.key(input_file))
+            if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+                self.count_hit += 1
+                return dict(entry['facts'])
+            self.count_miss += 1
+        return None
+
+    def put(self, input_file, facts):
+        try:
+            stat = os.stat(input_file)
+        except OSError:
+            return
+        with self.lock:
+            self.entries[self.key(input_file)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'facts': dict(facts)}
+
+    def evict_missing(self):
+        with self.lock:
+            missing = [key for key in self.entries if not os.path.isfile(key)]
+            for key in missing:
+                del self.entries[key]
+        return len(missing)
+
+    def save(self):
+        entries = self.read_entries()
+        with self.lock:
+            for key, entry in entries.items():
+                self.entries.setdefault(key, entry)
+        evicted = self.evict_missing()
+        path_temp = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self.lock:
+                with open(path_temp, 'w', encoding='utf-8') as f:
+                    json.dump({'version': PROBE_CACHE_VERSION, 'entries': self.entries}, f, indent=1, sort_keys=True)
+            os.replace(path_temp, self.path)
+            self.logger.log("debug", LOG_TAG_PROBE, "Saved probe cache:", {"Entries": len(self.entries), "Hits": self.count_hit, "Misses": self.count_miss, "Evicted": evicted})
+        except Exception as e:
+            self.logger.log("error", LOG_TAG_PROBE, "Failed to save probe cache:", {"Path": self.path, "Error": str(e)})
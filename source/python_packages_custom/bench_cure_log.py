@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+import tempfile
+import contextlib
+
+from cure_log import CureLog, LOG_LEVEL
+
+LOG_TAG_BENCH = '[⏱️ Bench]'
+
+# Shaped like the records compile_audio emits most often
+RECORDS = {
+    'string': lambda i: ('debug', LOG_TAG_BENCH, 'Output:', f'size=  {i}KiB time=00:00:{i % 60:02d}.00 bitrate= 320.0kbits/s'),
+    'path': lambda i: ('info', LOG_TAG_BENCH, 'Complete:', {'Output': f'out/Artist/Album/flac/{i}_Title.flac'}),
+    'object': lambda i: ('debug', LOG_TAG_BENCH, 'Probed source:', {'Input': f'in/Artist/Album/{i}.wav', 'Probe': 'mutagen', 'bit_rate': 1411200, 'codec': 'pcm_s16le', 'duration': 180.5})
+}
+
+def runBenchmark(name, count, logLevelConsole, logLevelFile):
+    with tempfile.TemporaryDirectory() as tempDir:
+        log = CureLog(os.path.join(tempDir, 'bench.log'), logLevelConsole=logLevelConsole, logLevelFile=logLevelFile)
+        makeRecord = RECORDS[name]
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            timeStart = time.perf_counter()
+            for i in range(count):
+                log.log(*makeRecord(i))
+            log.close()
+            seconds = time.perf_counter() - timeStart
+    return count / seconds
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sinks = {
+        'file': (LOG_LEVEL['NONE'], LOG_LEVEL['ALL']),
+        'console+file': (LOG_LEVEL['ALL'], LOG_LEVEL['ALL']),
+        'filtered': (LOG_LEVEL['NONE'], LOG_LEVEL['NONE'])
+    }
+    print(f"{'record':<8} {'sinks':<13} {'records/s':>10}")
+    for name in RECORDS:
+        for sinkName, (logLevelConsole, logLevelFile) in sinks.items():
+            print(f"{name:<8} {sinkName:<13} {runBenchmark(name, count, logLevelConsole, logLevelFile):>10.0f}")
+
+if __name__ == '__main__':
+    main()
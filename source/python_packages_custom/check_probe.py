@@ -0,0 +1,66 @@
+import os
+import sys
+import glob
+
+from cure_log import CureLog
+from albumus_ffmpeg import ProcessRunner
+from albumus_probe import probe_mutagen, probe_ffprobe
+
+LOG_TAG_CHECK = '[🔎 Probe Check]'
+
+# Facts that drive encoder settings and cache keys must match exactly
+EXACT_FACTS = ('bit_rate', 'codec', 'sample_rate', 'channels')
+# Duration only feeds cost estimates and progress; containers disagree by the encoder delay and padding
+DURATION_TOLERANCE_SECONDS = 0.1
+SOURCE_EXTENSIONS = ('.wav', '.flac', '.mp3', '.ogg')
+
+def compare_facts(facts_mutagen, facts_ffprobe):
+    differences = {
+        key: {"mutagen": facts_mutagen.get(key), "ffprobe": facts_ffprobe.get(key)}
+        for key in EXACT_FACTS if facts_mutagen.get(key) != facts_ffprobe.get(key)
+    }
+    duration_mutagen = facts_mutagen.get('duration')
+    duration_ffprobe = facts_ffprobe.get('duration')
+    if (duration_mutagen is None) != (duration_ffprobe is None) or (
+        duration_mutagen is not None and abs(duration_mutagen - duration_ffprobe) > DURATION_TOLERANCE_SECONDS
+    ):
+        differences['duration'] = {"mutagen": duration_mutagen, "ffprobe": duration_ffprobe}
+    return differences
+
+def main():
+    """
+    Probe every source under the given directories (default: the example project) with both mutagen and
+    ffprobe and report the facts they disagree on. Exits with 1 on any difference.
+    """
+    location_script = os.path.dirname(os.path.abspath(__file__))
+    input_dirs = sys.argv[1:] or [os.path.join(location_script, '../../example/in')]
+    logger = CureLog(os.path.join(location_script, '../../_log/check_probe.log'))
+    runner = ProcessRunner(logger)
+
+    files = sorted(
+        path for input_dir in input_dirs for path in glob.glob(os.path.join(input_dir, '**', '*'), recursive=True)
+        if path.lower().endswith(SOURCE_EXTENSIONS)
+    )
+    mismatched = 0
+    try:
+        for path in files:
+            facts_mutagen = probe_mutagen(path)
+            facts_ffprobe = probe_ffprobe(path, runner)
+            if facts_mutagen is None or facts_ffprobe is None:
+                # Files mutagen can't read are probed with ffprobe anyway, so there is nothing to disagree on
+                logger.log("notice", LOG_TAG_CHECK, "Skipped, not read by both probes:", {"Input": path, "Mutagen": facts_mutagen is not None, "FFprobe": facts_ffprobe is not None})
+                continue
+            differences = compare_facts(facts_mutagen, facts_ffprobe)
+            if differences:
+                mismatched += 1
+                logger.log("error", LOG_TAG_CHECK, "Probes disagree:", {"Input": path, **differences})
+            else:
+                logger.log("success", LOG_TAG_CHECK, "Probes agree:", {"Input": path, **facts_mutagen})
+    finally:
+        runner.close()
+
+    logger.log("end" if not mismatched else "warn", LOG_TAG_CHECK, "Checked sources:", {"Files": len(files), "Mismatched": mismatched})
+    sys.exit(1 if mismatched else 0)
+
+if __name__ == '__main__':
+    main()
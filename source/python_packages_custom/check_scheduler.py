@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+from cure_log import CureLog
+from albumus_jobs import JobScheduler
+
+LOG_TAG_CHECK = '[🔎 Scheduler Check]'
+
+CPU_BUDGET = 4
+# Seconds a job may start after its reservation (thread start-up and sleep jitter)
+START_TOLERANCE_SECONDS = 0.1
+
+def sleep_job(seconds, starts, name):
+    starts[name] = time.perf_counter()
+    time.sleep(seconds)
+    return {name: 0}
+
+def main():
+    """
+    Simulate a wide job (3 of 4 CPU slots, like a FLAC encode with `ffmpeg.threads.flac` set) queued behind a
+    longer 2-slot job, followed by many short 1-slot jobs. The wide job must start once the longer job ends,
+    rather than after every short job has run, where it would run last with a slot left idle. Exits with 1 when
+    it doesn't.
+    """
+    location_script = os.path.dirname(os.path.abspath(__file__))
+    logger = CureLog(os.path.join(location_script, '../../_log/check_scheduler.log'))
+    scheduler = JobScheduler(logger, CPU_BUDGET, CPU_BUDGET)
+
+    starts = {}
+    jobs = [("long", 0.9, 2), ("wide", 0.8, 3)] + [(f"short {index}", 0.3 - index * 0.01, 1) for index in range(16)]
+    for name, seconds, slots in jobs:
+        scheduler.add(name, sleep_job, seconds, starts, name, cost=seconds, slots=slots)
+    time_start = time.perf_counter()
+    summary = scheduler.run()
+
+    # Ideal: the work spread evenly over all slots
+    seconds_ideal = sum(seconds * slots for _, seconds, slots in jobs) / CPU_BUDGET
+    delay_wide = starts["wide"] - time_start - jobs[0][1]
+    passed = not summary["Failed"] and delay_wide <= START_TOLERANCE_SECONDS
+    logger.log("end" if passed else "warn", LOG_TAG_CHECK, "Checked scheduler:", {
+        "Seconds": summary["Seconds"], "Ideal Seconds": round(seconds_ideal, 3),
+        "Wide Job Start Delay": round(delay_wide, 3), "Passed": passed
+    })
+    sys.exit(0 if passed else 1)
+
+if __name__ == '__main__':
+    main()
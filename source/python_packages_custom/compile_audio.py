@@ -1,24 +1,29 @@
 import os
 import sys
+import shutil
 from mutagen.oggvorbis import OggVorbis
-from mutagen.flac import Picture, FLAC
+from mutagen.flac import FLAC
 from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC, TIT2, TALB, TPE1, TDRC, COMM, TCON, TRCK, TPE2, TCOP, TCOM
-import base64
-import subprocess
+from mutagen.id3 import ID3, TIT2, TALB, TPE1, TDRC, COMM, TCON, TRCK, TPE2, TCOP, TCOM
+import argparse
+import time
 from PIL import Image
 import json
+import multiprocessing
+from multiprocessing import util as multiprocessing_util
 
 SCRIPT_TITLE = "Albumus Audio Compiler"
 LOG_TAG_COMPILE = "[🎵 Compile Audio]"
 
-print(f'{LOG_TAG_COMPILE} [Init] {SCRIPT_TITLE} Importing...')
+# Worker processes import this module again; only the parent announces it
+if multiprocessing.current_process().name == 'MainProcess':
+    print(f'{LOG_TAG_COMPILE} [Init] {SCRIPT_TITLE} Importing...')
 
 # Path to this Python file
 LOCATION_SCRIPT = os.path.dirname(os.path.abspath(__file__))
 DIR_ROOT = os.path.join(LOCATION_SCRIPT, '../../')
 
-from cure_log import CureLog
+from cure_log import CureLog, LOG_LEVEL
 
 logger = CureLog(os.path.join(DIR_ROOT, '_log/compile_audio.log'))
 
@@ -38,6 +43,15 @@ except Exception as e:
     sys.exit(0)
 
 from load_project_config import load_project_config
+from albumus_jobs import JobScheduler, resolve_worker_count, EXECUTORS
+from albumus_manifest import BuildManifest, fingerprint_file, fingerprint_value
+from albumus_journal import get_temp_path, remove_temp_files
+from albumus_cost import CostModel
+from albumus_ffmpeg import ProcessRunner, ProgressParser, FFMPEG_PROGRESS_ARGS, RETURN_INTERRUPTED
+from albumus_metadata import MetadataCache
+from albumus_art import CoverArt, open_image_rgb, resize_cascade
+from albumus_cache import ContentCache, hash_file, hash_key, link_or_copy
+from albumus_probe import ProbeCache, probe_mutagen, probe_ffprobe, LOG_TAG_PROBE
 
 # Load default and project-specific config
 default_config_path = os.path.join(DIR_ROOT, 'config', 'default', 'project', 'config.json')
@@ -48,20 +62,60 @@ project_config = load_project_config(default_config_path, project_config_path)
 logger.log("debug", LOG_TAG_COMPILE, "Loaded config:", project_config)
 
 log_relative = project_config.get("logging", {}).get("log_relative_paths", True)
+trace_settings = project_config.get("logging", {}).get("trace", {})
+if trace_settings.get("enabled", True):
+    logger.enableTracing()
+jsonl_settings = project_config.get("logging", {}).get("jsonl", {})
+if jsonl_settings.get("enabled", False):
+    logger.enableJsonl(
+        os.path.join(DIR_ROOT, jsonl_settings.get("path", "_log/compile_audio.jsonl")),
+        maxBytes=int(jsonl_settings.get("max_megabytes", 32) * 1024 * 1024),
+        backupCount=jsonl_settings.get("backup_count", 10),
+        compress=jsonl_settings.get("compress", True),
+        logLevel=LOG_LEVEL.get(str(jsonl_settings.get("level", "ALL")).upper(), LOG_LEVEL['ALL'])
+    )
+progress_interval = project_config.get("logging", {}).get("progress_interval_seconds", 5)
 ffmpeg_strategy = project_config.get("ffmpeg", {}).get("bitrate_strategy", {})
 mp3_strategy = ffmpeg_strategy.get("mp3", {})
 ogg_strategy = ffmpeg_strategy.get("ogg", {})
+ffmpeg_single_decode = project_config.get("ffmpeg", {}).get("single_decode", False)
+ffmpeg_embed_tags = project_config.get("ffmpeg", {}).get("embed_tags", False)
+ffmpeg_timeout = project_config.get("ffmpeg", {}).get("timeout_seconds", 0) or None
+ffmpeg_threads = {"flac": 1, "mp3": 1, "ogg": 1, "wav": 1, **project_config.get("ffmpeg", {}).get("threads", {})}
+encode_cache_settings = project_config.get("ffmpeg", {}).get("encode_cache", {})
+encode_cache_link = encode_cache_settings.get("link", True)
+tag_padding = project_config.get("output", {}).get("tag_padding", 16384)
+embed_art_settings = project_config.get("output", {}).get("embed_art", {})
+embed_art_settings = embed_art_settings if embed_art_settings.get("enabled", False) else None
+
+metadata_cache = MetadataCache()
+
+art_cache_settings = project_config.get("output", {}).get("art_cache", {})
+art_cache_link = art_cache_settings.get("link", True)
+art_cache = ContentCache(
+    os.path.join(DIR_ROOT, '_cache', 'art'), logger,
+    max_bytes=int(art_cache_settings.get("max_megabytes", 256) * 1024 * 1024), name='art'
+) if art_cache_settings.get("enabled", True) else None
+encode_cache = ContentCache(
+    os.path.join(DIR_ROOT, '_cache', 'encode'), logger,
+    max_bytes=int(encode_cache_settings.get("max_megabytes", 4096) * 1024 * 1024), name='encode'
+) if encode_cache_settings.get("enabled", False) else None
+# Cached payloads are stored untagged, so tags are always applied afterwards by mutagen
+if encode_cache and ffmpeg_embed_tags:
+    logger.log("notice", LOG_TAG_COMPILE, "ffmpeg.embed_tags is ignored while the encode cache is enabled, tagging with mutagen")
+    ffmpeg_embed_tags = False
+probe_cache = ProbeCache(os.path.join(DIR_ROOT, '_cache', 'probe_cache.json'), logger)
+process_runner = ProcessRunner(logger)
+cost_model = CostModel(os.path.join(DIR_ROOT, '_cache', 'cost_model.json'), logger)
 
 def read_metadata(metadata_artist_file, metadata_album_file, metadata_track_file, song_file, total_tracks):
     try:
-        with open(metadata_artist_file, 'r', encoding='utf-8') as f:
-            artist_data = json.load(f)
-        with open(metadata_album_file, 'r', encoding='utf-8') as f:
-            album_data = json.load(f)
-        with open(metadata_track_file, 'r', encoding='utf-8') as f:
-            track_data_all = json.load(f)
-
-        track_data = track_data_all.get(song_file, {})
+        artist_data = metadata_cache.load(metadata_artist_file)
+        album_data = metadata_cache.load(metadata_album_file)
+        track_data_all = metadata_cache.load(metadata_track_file)
+
+        # Copy the cached entry, the track number is padded below
+        track_data = dict(track_data_all.get(song_file, {}))
         if 'tracknumber' in track_data:
             track_num = int(track_data['tracknumber'])
             pad_length = len(str(total_tracks))
@@ -75,155 +129,379 @@ def read_metadata(metadata_artist_file, metadata_album_file, metadata_track_file
         logger.log("error", LOG_TAG_COMPILE, "Error loading metadata JSON:", e)
         return {}, None
 
-def add_cover_art(audio_file, cover_art_path, audio_format):
-    with open(cover_art_path, 'rb') as img_file:
-        cover_data = img_file.read()
-
-    if audio_format == 'ogg':
-        audio = OggVorbis(audio_file)
-        picture = Picture()
-        picture.type = 3  # Cover (front)
-        picture.desc = 'Cover Art'
-        picture.data = cover_data
-        audio['metadata_block_picture'] = [base64.b64encode(picture.write()).decode('ascii')]
-        audio.save()
-    elif audio_format == 'mp3':
-        audio = MP3(audio_file, ID3=ID3)
-        if audio.tags is None:
-            audio.add_tags()
-        audio.tags.add(
-            APIC(
-                encoding=3,  # UTF-8
-                mime='image/png',  # MIME type of the cover art image
-                type=3,  # Front cover
-                desc='Cover Art',
-                data=cover_data
-            )
-        )
-        audio.save()
-    elif audio_format == 'flac':
-        audio = FLAC(audio_file)
-        picture = Picture()
-        picture.type = 3  # Cover (front)
-        picture.desc = 'Cover Art'
-        picture.data = cover_data
-        audio.add_picture(picture)
-        audio.save()
-
-def add_metadata_to_file(audio_file, metadata, audio_format):
+ID3_MAP = {
+    'title': TIT2,
+    'album': TALB,
+    'artist': TPE1,
+    'album_artist': TPE2,
+    'date': TDRC,
+    'comment': COMM,
+    'genre': TCON,
+    'tracknumber': TRCK,
+    'composer': TCOM,
+    'copyright': TCOP
+}
+
+def get_tag_padding(info):
+    # Keep existing padding while it is reasonable, otherwise reserve enough for later retags to be written in place
+    if 0 <= info.padding <= tag_padding * 4:
+        return info.padding
+    return tag_padding
+
+class TagsDontFit(Exception):
+    pass
+
+def get_tag_padding_in_place(info):
+    # Same file size, so only the tag block is rewritten; mutagen asks before writing anything, so raising is safe
+    if info.padding < 0:
+        raise TagsDontFit()
+    return info.padding
+
+def tag_output_file(audio_file, metadata, cover_art, audio_format, tags_removed=(), replace_cover=False, in_place=False):
+    # Text tags and cover art are applied in a single load/save per file.
+    # With `in_place`, raises TagsDontFit (leaving the file untouched) when the tags outgrow the existing padding
+    padding = get_tag_padding_in_place if in_place else get_tag_padding
     if audio_format == 'ogg':
         audio = OggVorbis(audio_file)
+        for key in tags_removed:
+            if key in audio:
+                del audio[key]
         for key, value in metadata.items():
             audio[key] = value
-        audio.save()
+        if cover_art:
+            audio['metadata_block_picture'] = [cover_art.picture_b64]
+        elif replace_cover and 'metadata_block_picture' in audio:
+            del audio['metadata_block_picture']
+        audio.save(padding=padding)
     elif audio_format == 'mp3':
         audio = MP3(audio_file, ID3=ID3)
         if audio.tags is None:
             audio.add_tags()
-        id3_map = {
-            'title': TIT2,
-            'album': TALB,
-            'artist': TPE1,
-            'album_artist': TPE2,
-            'date': TDRC,
-            'comment': COMM,
-            'genre': TCON,
-            'tracknumber': TRCK,
-            'composer': TCOM,
-            'copyright': TCOP
-        }
+        for key in tags_removed:
+            if key in ID3_MAP:
+                audio.tags.delall(ID3_MAP[key].__name__)
         for key, value in metadata.items():
-            tag_class = id3_map.get(key)
+            tag_class = ID3_MAP.get(key)
             if tag_class:
                 if key == 'comment':
                     audio.tags.add(tag_class(encoding=3, desc='', text=value))
                 else:
                     audio.tags.add(tag_class(encoding=3, text=value))
-        audio.save()
+        if replace_cover:
+            audio.tags.delall('APIC')
+        if cover_art:
+            audio.tags.add(cover_art.apic)
+        audio.save(padding=padding)
     elif audio_format == 'flac':
         audio = FLAC(audio_file)
+        for key in tags_removed:
+            if audio.tags is not None and key in audio.tags:
+                del audio.tags[key]
         for key, value in metadata.items():
             audio[key] = value
-        audio.save()
+        if replace_cover:
+            audio.clear_pictures()
+        if cover_art:
+            audio.add_picture(cover_art.picture)
+        audio.save(padding=padding)
 
 LOG_TAG_FFMPEG = LOG_TAG_COMPILE + " [🔊 FFmpeg]"
 
-def run_ffmpeg(command_args):
+def log_ffmpeg_progress(input_file):
+    """
+    Build a progress event handler for one ffmpeg run that logs at most once per `progress_interval`.
+    """
+    duration = get_probe(input_file).get('duration')
+    state = {"logged": time.monotonic()}
+
+    def on_event(event):
+        now = time.monotonic()
+        finished = event['progress'] == 'end'
+        if not finished and now - state["logged"] < progress_interval:
+            return
+        state["logged"] = now
+        progress = {"Input": get_path_formatted(input_file)}
+        if duration and event['out_time'] is not None:
+            progress["Percent"] = round(min(event['out_time'] / duration, 1) * 100, 1)
+        progress["Seconds"] = event['out_time']
+        progress["Speed"] = f"{event['speed']}x" if event['speed'] is not None else "N/A"
+        progress["Bitrate"] = f"{event['bitrate']} kbit/s" if event['bitrate'] is not None else "N/A"
+        logger.log("debug" if finished else "info", LOG_TAG_FFMPEG, "Encoded:" if finished else "Encoding:", progress)
+
+    return on_event
+
+def run_ffmpeg(command_args, input_file):
+    command_args = [command_args[0], *FFMPEG_PROGRESS_ARGS, *command_args[1:]]
     logger.log("debug", LOG_TAG_FFMPEG, "Running command:", command_args)
 
-    try:
-        process = subprocess.Popen(
-            command_args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True
-        )
-        for line in process.stdout:
-            logger.log("debug", LOG_TAG_FFMPEG, "Output:", line.rstrip())
-        process.wait()
-        if process.returncode != 0:
-            logger.log("error", LOG_TAG_FFMPEG, "ffmpeg exited with code", process.returncode)
-        return process.returncode
-    except KeyboardInterrupt:
+    # Progress arrives on stdout as key=value blocks and is only parsed; stderr is kept to explain a failure
+    parser = ProgressParser(log_ffmpeg_progress(input_file))
+    result = process_runner.run(command_args, timeout=ffmpeg_timeout, on_line=parser.feed, capture=True, merge_stderr=False)
+    if result.returncode == RETURN_INTERRUPTED:
         logger.log("notice", LOG_TAG_FFMPEG, "FFmpeg process interrupted by user.")
-        return 130  # Standard code for Ctrl+C
-    except Exception as e:
-        logger.log("error", LOG_TAG_FFMPEG, "Failed to run ffmpeg:", e)
-        return 1
+    elif result.returncode != 0:
+        logger.log("error", LOG_TAG_FFMPEG, "ffmpeg exited with code", {"Code": result.returncode, "Output": (result.stderr or '').strip()})
+    return result.returncode
+
+def get_probe(input_file):
+    facts = probe_cache.get(input_file)
+    if facts is not None:
+        return facts
+
+    # Mutagen reads the stream headers in-process; ffprobe is only spawned for formats it can't parse.
+    # A failed, timed out or interrupted probe is never cached
+    facts = probe_mutagen(input_file)
+    probe = "mutagen"
+    if facts is None:
+        probe = "ffprobe"
+        try:
+            facts = probe_ffprobe(input_file, process_runner, ffmpeg_timeout)
+        except Exception as e:
+            logger.log("error", LOG_TAG_PROBE, "Failed to probe source:", {"Input": get_path_formatted(input_file), "Error": str(e)})
+            return {}
+        if facts is None:
+            # Not cached, so the next run probes the file again instead of reusing empty facts
+            logger.log("error", LOG_TAG_PROBE, "Failed to probe source:", {"Input": get_path_formatted(input_file)})
+            return {}
+
+    logger.log("debug", LOG_TAG_PROBE, "Probed source:", {"Input": get_path_formatted(input_file), "Probe": probe, **facts})
+    probe_cache.put(input_file, facts)
+    return facts
+
+def get_source_hash(input_file):
+    # Stored alongside the probe facts, so an unchanged source is only hashed once
+    facts = get_probe(input_file)
+    if not facts:
+        # Failed probes are never cached, and neither is a hash without their facts
+        return hash_file(input_file)
+    if not facts.get('sha256'):
+        facts['sha256'] = hash_file(input_file)
+        probe_cache.put(input_file, facts)
+    return facts['sha256']
 
 def get_bitrate(input_file):
-    result = subprocess.run(
-        ['ffprobe', '-v', 'error', '-select_streams', 'a:0', '-show_entries', 'stream=bit_rate', '-of', 'default=noprint_wrappers=1:nokey=1', input_file],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    return int(result.stdout.strip()) if result.stdout.strip().isdigit() else None
+    return get_probe(input_file).get('bit_rate')
 
 def get_path_formatted(path):
     return os.path.relpath(path, config_dir) if log_relative else path
 
-def convert_formats(input_file, base_name, output_dir, metadata, cover_art_path, formats):
-    source_bitrate = get_bitrate(input_file)
+ffmpeg_version = None
+
+def get_ffmpeg_version():
+    # Part of the encode cache key, so upgrading ffmpeg never reuses payloads from an older encoder
+    global ffmpeg_version
+    if ffmpeg_version is None:
+        result = process_runner.run(['ffmpeg', '-version'], timeout=ffmpeg_timeout, capture=True)
+        ffmpeg_version = result.stdout.splitlines()[0] if result.returncode == 0 and result.stdout else 'unknown'
+    return ffmpeg_version
+
+def get_codec_args(fmt, source_bitrate):
+    if fmt == 'mp3':
+        if source_bitrate:
+            return ['-codec:a', 'libmp3lame', '-b:a', f'{source_bitrate}k']
+        fallback_q = str(mp3_strategy.get("fallback_qscale", 2))
+        return ['-codec:a', 'libmp3lame', '-qscale:a', fallback_q]
+    elif fmt == 'flac':
+        return ['-c:a', 'flac', '-compression_level', '8']
+    elif fmt == 'wav':
+        return []
+    elif fmt == 'ogg':
+        if source_bitrate:
+            min_q = ogg_strategy.get("min_quality", 0)
+            max_q = ogg_strategy.get("max_quality", 10)
+            base = ogg_strategy.get("base_bitrate", 64000)
+            step = ogg_strategy.get("step", 16000)
+
+            quality = min(max((source_bitrate - base) // step, min_q), max_q)
+            return ['-codec:a', 'libvorbis', '-qscale:a', str(quality)]
+        fallback_q = str(ogg_strategy.get("fallback_qscale", 10))
+        return ['-codec:a', 'libvorbis', '-qscale:a', fallback_q]
+    raise ValueError(f"Unsupported output format: {fmt}")
+
+# ffmpeg's ID3 muxer maps these generic keys onto the same frames as ID3_MAP (comment would become TXXX, not COMM)
+FFMPEG_ID3_KEYS = {
+    'title': 'title',
+    'album': 'album',
+    'artist': 'artist',
+    'album_artist': 'album_artist',
+    'date': 'date',
+    'genre': 'genre',
+    'tracknumber': 'track',
+    'composer': 'composer',
+    'copyright': 'copyright'
+}
+# ffmpeg renames these when writing Vorbis comments (e.g. album_artist -> ALBUMARTIST), so mutagen writes them
+FFMPEG_VORBIS_RENAMED_KEYS = ('album_artist', 'track', 'disc', 'comment')
+# The Ogg muxer can't carry an attached picture, so Ogg cover art is always written by mutagen
+FFMPEG_COVER_FORMATS = ('mp3', 'flac')
+
+def split_embedded_tags(metadata, fmt):
+    """
+    Split metadata into the fields ffmpeg writes during the encode and the remainder mutagen has to write.
+    """
+    if fmt == 'mp3':
+        metadata_ffmpeg = {FFMPEG_ID3_KEYS[k]: str(v) for k, v in metadata.items() if k in FFMPEG_ID3_KEYS}
+        metadata_mutagen = {k: v for k, v in metadata.items() if k in ID3_MAP and k not in FFMPEG_ID3_KEYS}
+        return metadata_ffmpeg, metadata_mutagen
+
+    metadata_ffmpeg = {}
+    metadata_mutagen = {}
+    for key, value in metadata.items():
+        if key in FFMPEG_VORBIS_RENAMED_KEYS or isinstance(value, (list, dict)):
+            metadata_mutagen[key] = value
+        else:
+            metadata_ffmpeg[key] = str(value)
+    return metadata_ffmpeg, metadata_mutagen
+
+def get_embed_cover_path(cover_art, formats):
+    if ffmpeg_embed_tags and cover_art and any(fmt in FFMPEG_COVER_FORMATS for fmt in formats):
+        return cover_art.file_path
+    return None
+
+def get_input_args(input_file, embed_cover_path):
+    command_args = ['-i', input_file]
+    if embed_cover_path:
+        command_args += ['-i', embed_cover_path]
+    return command_args
+
+def get_output_args(fmt, source_bitrate, metadata, embed_cover_path, mapped):
+    output_args = []
+    if mapped or embed_cover_path:
+        output_args += ['-map', '0:a:0']
+    if ffmpeg_embed_tags and fmt != 'wav':
+        if embed_cover_path and fmt in FFMPEG_COVER_FORMATS:
+            output_args += [
+                '-map', '1:v:0', '-c:v', 'copy', '-disposition:v:0', 'attached_pic',
+                '-metadata:s:v:0', 'title=Cover Art', '-metadata:s:v:0', 'comment=Cover (front)'
+            ]
+        for key, value in split_embedded_tags(metadata, fmt)[0].items():
+            output_args += ['-metadata', f'{key}={value}']
+    return output_args + get_codec_args(fmt, source_bitrate) + ['-threads', str(get_format_threads(fmt))]
+
+def get_format_threads(fmt):
+    try:
+        return max(int(ffmpeg_threads.get(fmt, 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+def get_job_slots(formats):
+    # Every output of a command runs its own encoder, so a multi-format job keeps all of their threads busy
+    return sum(get_format_threads(fmt) for fmt in formats)
+
+def run_ffmpeg_single(input_file, output_files, source_bitrate, metadata, cover_art):
+    results = {}
+    for fmt, output_file in output_files.items():
+        embed_cover_path = get_embed_cover_path(cover_art, [fmt])
+        command_args = ['ffmpeg', '-y', *get_input_args(input_file, embed_cover_path)]
+        command_args += [*get_output_args(fmt, source_bitrate, metadata, embed_cover_path, False), output_file]
+        results[fmt] = run_ffmpeg(command_args, input_file)
+        if results[fmt] == 130:
+            break
+    return results
+
+def run_ffmpeg_multi(input_file, output_files, source_bitrate, metadata, cover_art):
+    # Decode once and fan the decoded audio out to one mapped output per format
+    embed_cover_path = get_embed_cover_path(cover_art, output_files)
+    command_args = ['ffmpeg', '-y', *get_input_args(input_file, embed_cover_path)]
+    for fmt, output_file in output_files.items():
+        command_args += [*get_output_args(fmt, source_bitrate, metadata, embed_cover_path, True), output_file]
+
+    result = run_ffmpeg(command_args, input_file)
+    if result == 0:
+        return {fmt: 0 if os.path.isfile(output_file) else 1 for fmt, output_file in output_files.items()}
+    if result == 130:
+        return {fmt: 130 for fmt in output_files}
+
+    # A single failing encoder aborts the whole command, so retry each output alone to attribute the failure
+    logger.log("warn", LOG_TAG_FFMPEG, "Multi-output encode failed, retrying formats separately:", {"Input": get_path_formatted(input_file), "Formats": list(output_files)})
+    return run_ffmpeg_single(input_file, output_files, source_bitrate, metadata, cover_art)
+
+def tag_encoded_file(output_file, metadata, cover_art, fmt):
+    if not ffmpeg_embed_tags:
+        tag_output_file(output_file, metadata, cover_art, fmt)
+        return
+
+    # Tags and cover were written by ffmpeg during the encode, mutagen only fills in what ffmpeg can't express
+    metadata_ffmpeg, metadata_mutagen = split_embedded_tags(metadata, fmt)
+    embed_cover_path = get_embed_cover_path(cover_art, [fmt])
+    cover_mutagen = None if embed_cover_path else cover_art
+    if metadata_mutagen or cover_mutagen:
+        tag_output_file(output_file, metadata_mutagen, cover_mutagen, fmt)
+
+    logger.log("debug", LOG_TAG_COMPILE, "Tagged during encode:", {
+        "Output": get_path_formatted(output_file),
+        "FFmpeg": ', '.join(metadata_ffmpeg) + (' + cover' if embed_cover_path else ''),
+        "Mutagen": ', '.join(metadata_mutagen) + (' + cover' if cover_mutagen else '')
+    })
+
+def convert_formats(input_file, base_name, output_dir, metadata, cover_art, formats, source_bitrate=None):
+    if source_bitrate is None:
+        source_bitrate = get_bitrate(input_file)
+
+    output_files = {}
     for fmt in formats:
         output_format_dir = os.path.join(output_dir, fmt)
         os.makedirs(output_format_dir, exist_ok=True)
-        output_file = os.path.join(output_format_dir, f"{base_name}.{fmt}")
-
-        logger.log("info", LOG_TAG_FFMPEG, "Processing:", {"Input": get_path_formatted(input_file)})
-        result = 0
-
-        if fmt == 'mp3':
-            if source_bitrate:
-                result = run_ffmpeg(['ffmpeg', '-y', '-i', input_file, '-codec:a', 'libmp3lame', '-b:a', f'{source_bitrate}k', output_file])
-            else:
-                fallback_q = str(mp3_strategy.get("fallback_qscale", 2))
-                result = run_ffmpeg(['ffmpeg', '-y', '-i', input_file, '-codec:a', 'libmp3lame', '-qscale:a', fallback_q, output_file])
-        elif fmt == 'flac':
-            result = run_ffmpeg(['ffmpeg', '-y', '-i', input_file, '-c:a', 'flac', '-compression_level', '8', output_file])
-        elif fmt == 'wav':
-            result = run_ffmpeg(['ffmpeg', '-y', '-i', input_file, output_file])
-        elif fmt == 'ogg':
-            if source_bitrate:
-                min_q = ogg_strategy.get("min_quality", 0)
-                max_q = ogg_strategy.get("max_quality", 10)
-                base = ogg_strategy.get("base_bitrate", 64000)
-                step = ogg_strategy.get("step", 16000)
-
-                quality = min(max((source_bitrate - base) // step, min_q), max_q)
-                result = run_ffmpeg(['ffmpeg', '-y', '-i', input_file, '-codec:a', 'libvorbis', '-qscale:a', str(quality), output_file])
-            else:
-                fallback_q = str(ogg_strategy.get("fallback_qscale", 10))
-                result = run_ffmpeg(['ffmpeg', '-y', '-i', input_file, '-codec:a', 'libvorbis', '-qscale:a', fallback_q, output_file])
-
-        if result != 0:
-            logger.log("error", LOG_TAG_FFMPEG, "Processing Exited Early, see above...")
+        output_files[fmt] = os.path.join(output_format_dir, f"{base_name}.{fmt}")
+
+    # Everything is written and tagged under a temporary name and only renamed into place once complete
+    temp_files = {fmt: get_temp_path(output_file) for fmt, output_file in output_files.items()}
+
+    # Untagged payloads of the same source and encoder settings are reused across tracks and projects
+    results = {}
+    cache_keys = {}
+    if encode_cache:
+        source_hash = get_source_hash(input_file)
+        for fmt, output_file in output_files.items():
+            cache_keys[fmt] = get_encode_cache_key(source_hash, fmt, source_bitrate)
+            path_cached = encode_cache.get(cache_keys[fmt])
+            if path_cached:
+                # Tagged formats are edited after the copy, so only WAV may share the cached inode
+                method = link_or_copy(path_cached, temp_files[fmt], encode_cache_link and fmt == 'wav')
+                logger.log("info", LOG_TAG_FFMPEG, "Reused cached encode:", {"Output": get_path_formatted(output_file), "Method": method})
+                results[fmt] = 0
+
+    temp_files_encode = {fmt: temp_file for fmt, temp_file in temp_files.items() if fmt not in results}
+    if temp_files_encode:
+        logger.log("info", LOG_TAG_FFMPEG, "Processing:", {"Input": get_path_formatted(input_file), "Formats": list(temp_files_encode)})
+
+        for temp_file in temp_files_encode.values():
+            if os.path.lexists(temp_file):
+                os.remove(temp_file)
+
+        time_start = time.perf_counter()
+        if ffmpeg_single_decode and len(temp_files_encode) > 1:
+            results.update(run_ffmpeg_multi(input_file, temp_files_encode, source_bitrate, metadata, cover_art))
         else:
-            logger.log("success", LOG_TAG_FFMPEG, "Complete:", {"Output": get_path_formatted(output_file)})
+            results.update(run_ffmpeg_single(input_file, temp_files_encode, source_bitrate, metadata, cover_art))
+        if all(results.get(fmt) == 0 for fmt in temp_files_encode):
+            cost_model.observe(list(temp_files_encode), get_probe(input_file).get('duration'), time.perf_counter() - time_start)
+
+        if encode_cache:
+            for fmt, temp_file in temp_files_encode.items():
+                if results.get(fmt) == 0:
+                    encode_cache.put(cache_keys[fmt], temp_file, f'.{fmt}')
+
+    for fmt, output_file in output_files.items():
+        temp_file = temp_files[fmt]
+        result = results.get(fmt, 130)
+        if result != 0:
+            logger.log("error", LOG_TAG_FFMPEG, "Processing Exited Early, see above...", {"Output": get_path_formatted(output_file), "Code": result})
+            if os.path.lexists(temp_file):
+                os.remove(temp_file)
+            continue
 
         if fmt != 'wav':
-            add_metadata_to_file(output_file, metadata, fmt)
-            add_cover_art(output_file, cover_art_path, fmt)
+            tag_encoded_file(temp_file, metadata, cover_art, fmt)
+
+        # The rename also replaces rather than writes through an existing output that is a hardlink into a cache
+        os.replace(temp_file, output_file)
+        logger.log("success", LOG_TAG_FFMPEG, "Complete:", {"Output": get_path_formatted(output_file)})
+
+    return results
+
+def get_encode_cache_key(source_hash, fmt, source_bitrate):
+    return hash_key(source_hash, fmt, get_codec_args(fmt, source_bitrate), get_ffmpeg_version())
 
 def copy_track_text_file(input_file, base_name, output_dir):
     input_txt_file = os.path.splitext(input_file)[0] + '.txt'
@@ -232,38 +510,251 @@ def copy_track_text_file(input_file, base_name, output_dir):
         os.makedirs(txt_output_dir, exist_ok=True)
         output_txt_file = os.path.join(txt_output_dir, f"{base_name}.txt")
         try:
-            with open(input_txt_file, 'rb') as src, open(output_txt_file, 'wb') as dst:
+            temp_txt_file = get_temp_path(output_txt_file)
+            with open(input_txt_file, 'rb') as src, open(temp_txt_file, 'wb') as dst:
                 dst.write(src.read())
+            os.replace(temp_txt_file, output_txt_file)
             logger.log("info", LOG_TAG_COMPILE, "Copied track text file", {
                 "From": get_path_formatted(input_txt_file),
                 "To": get_path_formatted(output_txt_file)
             })
+            return output_txt_file
         except Exception as e:
-            logger.log("error", LOG_TAG_COMPILE, "Failed to copy text file:", e)
+            logger.log("error", LOG_TAG_COMPILE, "Failed to copy text file:", {"Output": get_path_formatted(output_txt_file), "Error": str(e)})
+    return None
 
-def create_album_art_images(cover_art_path, output_folder, base_name):
+def rename_output(previous_file, output_file):
+    try:
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        os.replace(previous_file, output_file)
+        logger.log("info", LOG_TAG_COMPILE, "Renamed output:", {"From": get_path_formatted(previous_file), "To": get_path_formatted(output_file)})
+        return output_file
+    except Exception as e:
+        logger.log("error", LOG_TAG_COMPILE, "Failed to rename output:", {"Output": get_path_formatted(output_file), "Error": str(e)})
+        return None
+
+def retag_output(previous_file, output_file, metadata, cover_art, fmt, tags_previous, replace_cover=False):
+    """
+    Reuse an existing output whose audio is still current: move it to its new name and rewrite its text tags.
+    With `replace_cover` the embedded picture is swapped for `cover_art` (or removed when it is None).
+    """
+    if fmt == 'wav':
+        return {fmt: 0 if previous_file == output_file or rename_output(previous_file, output_file) else 1}
+    tags_removed = [key for key in tags_previous if key not in metadata]
+    try:
+        # When the tags fit the existing padding, the audio stays where it is and only the tag block is rewritten
+        try:
+            tag_output_file(previous_file, metadata, cover_art, fmt, tags_removed, replace_cover, in_place=True)
+            method = "in place"
+        except TagsDontFit:
+            # Larger tags (usually a new cover) move the audio, so a copy is tagged and renamed over the output
+            temp_file = get_temp_path(previous_file)
+            shutil.copyfile(previous_file, temp_file)
+            tag_output_file(temp_file, metadata, cover_art, fmt, tags_removed, replace_cover)
+            os.replace(temp_file, previous_file)
+            method = "copy"
+        # Renamed last: an interrupted retag leaves the old name, which the manifest still points to and retags again
+        if previous_file != output_file:
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            os.replace(previous_file, output_file)
+            logger.log("info", LOG_TAG_COMPILE, "Renamed output:", {"From": get_path_formatted(previous_file), "To": get_path_formatted(output_file)})
+        logger.log("success", LOG_TAG_COMPILE, "Retagged output:", {"Output": get_path_formatted(output_file), "Cover": "replaced" if replace_cover else "kept", "Method": method})
+        return {fmt: 0}
+    except Exception as e:
+        logger.log("error", LOG_TAG_COMPILE, "Failed to retag output:", {"Output": get_path_formatted(output_file), "Error": str(e)})
+        return {fmt: 1}
+
+def get_album_art_sizes(cover_art_path):
     sizes = {
         k: tuple(v) for k, v in project_config.get("output", {}).get("art_sizes", {}).items()
     }
 
+    # Only the header is read here, so this is cheap enough to call while planning jobs
     with Image.open(cover_art_path) as img:
         original_width, original_height = img.size
 
-        for size_name, dimensions in sizes.items():
-            target_width, target_height = dimensions
-            if target_width <= original_width and target_height <= original_height:
-                img_resized = img.resize(dimensions, Image.LANCZOS)
-                if img_resized.mode in ("RGBA", "P"):
-                    img_resized = img_resized.convert("RGB")
-                output_path = os.path.join(output_folder, f"{size_name}.jpg")
-                img_resized.save(
-                    output_path,
-                    project_config.get("output", {}).get("image_output_format", "JPEG"),
-                    quality=project_config.get("output", {}).get("image_quality", 95)
-                )
-                logger.log("info", LOG_TAG_COMPILE, "Created album art", {"name": size_name, "path": output_path})
-
-def process_album(artist_dir, album_dir, output_base_dir, formats):
+    return {
+        size_name: dimensions for size_name, dimensions in sizes.items()
+        if dimensions[0] <= original_width and dimensions[1] <= original_height
+    }
+
+def get_art_cache_key(cover_hash, dimensions):
+    output_config = project_config.get("output", {})
+    return hash_key(cover_hash, list(dimensions), output_config.get("image_output_format", "JPEG"), output_config.get("image_quality", 95))
+
+def create_album_art_images(cover_art_path, output_folder, base_name, size_names=None):
+    sizes = {
+        size_name: dimensions for size_name, dimensions in get_album_art_sizes(cover_art_path).items()
+        if size_names is None or size_name in size_names
+    }
+    created = {}
+    if not sizes:
+        return created
+
+    # Identical masters (singles, deluxe editions, other projects) reuse variants rendered before
+    cache_keys = {}
+    if art_cache:
+        cover_hash = hash_file(cover_art_path)
+        for size_name, dimensions in list(sizes.items()):
+            output_path = os.path.join(output_folder, f"{size_name}.jpg")
+            cache_keys[size_name] = get_art_cache_key(cover_hash, dimensions)
+            path_cached = art_cache.get(cache_keys[size_name])
+            if path_cached:
+                method = link_or_copy(path_cached, output_path, art_cache_link)
+                logger.log("info", LOG_TAG_COMPILE, "Reused cached album art", {"name": size_name, "path": output_path, "Method": method})
+                created[size_name] = output_path
+                del sizes[size_name]
+        if not sizes:
+            return created
+
+    output_config = project_config.get("output", {})
+    largest = max(sizes.values(), key=lambda dimensions: dimensions[0] * dimensions[1])
+
+    # Decode and mode-convert once, then derive each variant from the smallest sufficient larger image
+    time_start = time_job = time.perf_counter()
+    img = open_image_rgb(cover_art_path, largest)
+    logger.log("debug", LOG_TAG_COMPILE, "Decoded album art", {"path": cover_art_path, "Size": f"{img.width}x{img.height}", "Milliseconds": round((time.perf_counter() - time_start) * 1000, 1)})
+
+    for size_name, img_resized, source_size, seconds in resize_cascade(img, sizes):
+        output_path = os.path.join(output_folder, f"{size_name}.jpg")
+        # Renaming over the previous file also avoids writing through a hardlink into the art cache
+        temp_path = get_temp_path(output_path)
+        img_resized.save(
+            temp_path,
+            output_config.get("image_output_format", "JPEG"),
+            quality=output_config.get("image_quality", 95)
+        )
+        os.replace(temp_path, output_path)
+        logger.log("info", LOG_TAG_COMPILE, "Created album art", {
+            "name": size_name,
+            "path": output_path,
+            "From": f"{source_size[0]}x{source_size[1]}",
+            "Resize Milliseconds": round(seconds * 1000, 1)
+        })
+        if art_cache:
+            art_cache.put(cache_keys[size_name], output_path, '.jpg')
+        created[size_name] = output_path
+
+    cost_model.observe(['art'], 1, time.perf_counter() - time_job)
+    return created
+
+def get_track_inputs(file_path, metadata, cover_art, fmt):
+    # The source bitrate is derived from the source file, so its fingerprint plus the strategy covers the codec arguments
+    inputs = {
+        "source": fingerprint_file(file_path),
+        "config": fingerprint_value({"format": fmt, "bitrate_strategy": ffmpeg_strategy.get(fmt, {})})
+    }
+    if fmt != 'wav':
+        inputs["metadata"] = fingerprint_value(metadata)
+        inputs["cover"] = [fingerprint_file(cover_art.path), fingerprint_value(cover_art.embed_settings)] if cover_art else None
+    return inputs
+
+def get_art_inputs(cover_art_path, dimensions):
+    output_config = project_config.get("output", {})
+    return {
+        "cover": fingerprint_file(cover_art_path),
+        "config": fingerprint_value({
+            "size": dimensions,
+            "image_output_format": output_config.get("image_output_format", "JPEG"),
+            "image_quality": output_config.get("image_quality", 95)
+        })
+    }
+
+# Inputs that only affect tags and the embedded picture, never the encoded audio
+TAG_INPUTS = ('metadata', 'cover')
+
+def is_reserved_output(manifest, previous_file, output_file, reserved_outputs):
+    # Another track writes to this old name (e.g. two tracks swapped titles), possibly before it is read
+    return manifest.key(previous_file) != manifest.key(output_file) and manifest.key(previous_file) in reserved_outputs
+
+def find_retag_source(manifest, file_path, fmt, inputs, output_file, reserved_outputs=()):
+    """
+    Find the previous output of this source and format when its audio is still current, so only the tags or the
+    embedded cover differ. Returns (path, entry) or (None, None); the path may differ from the new output when
+    the title changed. An old output that is another track's new output (in `reserved_outputs`) is not reused.
+    """
+    previous_file, previous = manifest.find_previous(file_path, fmt)
+    if previous is None or not os.path.isfile(previous_file):
+        return None, None
+    if is_reserved_output(manifest, previous_file, output_file, reserved_outputs):
+        logger.log("notice", LOG_TAG_COMPILE, "Previous output is another track's new name, rebuilding:", {"Output": get_path_formatted(previous_file)})
+        return None, None
+    previous_inputs = previous.get('inputs', {})
+    if set(previous_inputs) != set(inputs) or any(previous_inputs[key] != value for key, value in inputs.items() if key not in TAG_INPUTS):
+        return None, None
+    return previous_file, previous
+
+def queue_album_art(scheduler, manifest, album_dir, cover_art_path, output_album_dir):
+    try:
+        sizes = get_album_art_sizes(cover_art_path)
+    except Exception as e:
+        logger.log("error", LOG_TAG_COMPILE, "Failed to read album art:", {"path": get_path_formatted(cover_art_path), "Error": str(e)})
+        return
+
+    art_inputs = {size_name: get_art_inputs(cover_art_path, dimensions) for size_name, dimensions in sizes.items()}
+    stale = [
+        size_name for size_name in sizes
+        if not manifest.is_current(os.path.join(output_album_dir, f"{size_name}.jpg"), art_inputs[size_name])
+    ]
+    if not stale:
+        return
+
+    def on_done(created):
+        for size_name, output_path in created.items():
+            manifest.record(output_path, art_inputs[size_name])
+
+    scheduler.add(f"{get_path_formatted(album_dir)} [art]", create_album_art_images, cover_art_path, output_album_dir, os.path.basename(album_dir), stale, on_done=on_done, cost=cost_model.estimate('art', 1))
+
+def queue_track(scheduler, manifest, file_path, base_name_output, output_album_dir, metadata, cover_art, formats, reserved_outputs=()):
+    track_inputs = {fmt: get_track_inputs(file_path, metadata, cover_art, fmt) for fmt in formats}
+    output_files = {fmt: os.path.join(output_album_dir, fmt, f"{base_name_output}.{fmt}") for fmt in formats}
+    stale = [fmt for fmt in formats if not manifest.is_current(output_files[fmt], track_inputs[fmt])]
+
+    def on_done(results):
+        for fmt, result in results.items():
+            if result == 0:
+                details = {"tags": sorted(metadata)} if fmt != 'wav' else {}
+                manifest.record(output_files[fmt], track_inputs[fmt], file_path, fmt, **details)
+
+    # When only metadata or the cover changed (or the title renamed the output), the audio is reused and only retagged
+    for fmt in list(stale):
+        previous_file, previous = find_retag_source(manifest, file_path, fmt, track_inputs[fmt], output_files[fmt], reserved_outputs)
+        if previous_file:
+            stale.remove(fmt)
+            cover_changed = previous['inputs'].get('cover') != track_inputs[fmt].get('cover')
+            scheduler.add(
+                f"{get_path_formatted(file_path)} [{fmt} {'cover' if cover_changed else 'tags'}]", retag_output,
+                previous_file, output_files[fmt], metadata, cover_art if cover_changed else None, fmt, previous.get("tags", []), cover_changed, on_done=on_done
+            )
+
+    if stale:
+        probe = get_probe(file_path)
+        source_bitrate = probe.get('bit_rate')
+        duration = probe.get('duration')
+        if ffmpeg_single_decode:
+            cost = sum(cost_model.estimate(fmt, duration) for fmt in stale)
+            scheduler.add(f"{get_path_formatted(file_path)} [{', '.join(stale)}]", convert_formats, file_path, base_name_output, output_album_dir, metadata, cover_art, stale, source_bitrate, on_done=on_done, cost=cost, slots=get_job_slots(stale))
+        else:
+            for fmt in stale:
+                scheduler.add(f"{get_path_formatted(file_path)} [{fmt}]", convert_formats, file_path, base_name_output, output_album_dir, metadata, cover_art, [fmt], source_bitrate, on_done=on_done, cost=cost_model.estimate(fmt, duration), slots=get_job_slots([fmt]))
+
+    input_txt_file = os.path.splitext(file_path)[0] + '.txt'
+    if os.path.exists(input_txt_file):
+        txt_inputs = {"source": fingerprint_file(input_txt_file)}
+        output_txt_file = os.path.join(output_album_dir, 'txt', f"{base_name_output}.txt")
+        if not manifest.is_current(output_txt_file, txt_inputs):
+            def on_done_txt(output_txt_file):
+                if output_txt_file:
+                    manifest.record(output_txt_file, txt_inputs, input_txt_file, 'txt')
+
+            previous_file, previous = manifest.find_previous(input_txt_file, 'txt')
+            if previous and previous.get('inputs') == txt_inputs and os.path.isfile(previous_file) and not is_reserved_output(manifest, previous_file, output_txt_file, reserved_outputs):
+                scheduler.add(f"{get_path_formatted(file_path)} [txt rename]", rename_output, previous_file, output_txt_file, on_done=on_done_txt)
+                return
+
+            scheduler.add(f"{get_path_formatted(file_path)} [txt]", copy_track_text_file, file_path, base_name_output, output_album_dir, on_done=on_done_txt)
+
+def process_album(artist_dir, album_dir, output_base_dir, formats, scheduler, manifest):
     cover_art_path = os.path.join(album_dir, 'folder.png')
     metadata_artist_file = os.path.join(artist_dir, 'metadata_artist.json')
     metadata_album_file = os.path.join(album_dir, 'metadata_album.json')
@@ -274,40 +765,147 @@ def process_album(artist_dir, album_dir, output_base_dir, formats):
     output_album_dir = os.path.join(output_base_dir, os.path.basename(artist_dir), os.path.basename(album_dir))
 
     os.makedirs(output_album_dir, exist_ok=True)
-    create_album_art_images(cover_art_path, output_album_dir, os.path.basename(album_dir))
+    queue_album_art(scheduler, manifest, album_dir, cover_art_path, output_album_dir)
+
+    # One cover payload per album, shared by every track and format
+    cover_art = None
+    if os.path.isfile(cover_art_path):
+        cover_art = CoverArt(cover_art_path, embed_art_settings, os.path.join(DIR_ROOT, '_cache', 'embed_art'))
+    else:
+        logger.log("warn", LOG_TAG_COMPILE, "Cover art not found, tagging without picture:", {"path": get_path_formatted(cover_art_path)})
 
+    tracks = []
     for file_path in files:
         file_name = os.path.basename(file_path)
         base_name = os.path.splitext(file_name)[0]
         metadata, track_number = read_metadata(metadata_artist_file, metadata_album_file, metadata_track_file, file_name, total_tracks)
         if track_number:
             title = metadata.get("title", base_name).replace(" ", "_")
-            base_name_output = f"{track_number}_{title}"
-            convert_formats(file_path, base_name_output, output_album_dir, metadata, cover_art_path, formats)
-            copy_track_text_file(file_path, base_name_output, output_album_dir)
+            tracks.append((file_path, f"{track_number}_{title}", metadata))
         else:
             logger.log("warn", LOG_TAG_COMPILE, 'Track number not found for file:', {"file": file_name})
 
-def process_all(input_base_dir, output_base_dir, formats):
+    # Every output the album's tracks will write, so a rename never reuses an old file another track overwrites
+    reserved_outputs = {
+        manifest.key(os.path.join(output_album_dir, fmt, f"{base_name_output}.{fmt}"))
+        for _, base_name_output, _ in tracks for fmt in [*formats, 'txt']
+    }
+    for file_path, base_name_output, metadata in tracks:
+        with logger.span(base_name_output, 'track', Input=get_path_formatted(file_path)):
+            queue_track(scheduler, manifest, file_path, base_name_output, output_album_dir, metadata, cover_art, formats, reserved_outputs)
+
+def save_caches():
+    # Shared by the main process and exiting workers of the 'process' executor
+    process_runner.close()
+    probe_cache.save()
+    cost_model.save()
+    if art_cache:
+        art_cache.save()
+    if encode_cache:
+        encode_cache.save()
+
+def init_worker_process(log_queue):
+    """
+    Set up a worker process of the 'process' executor: forward its log records to the parent and save what
+    its caches learned when it exits. Worker processes leave through os._exit, so atexit handlers don't run.
+    """
+    logger.forwardTo(log_queue, multiprocessing.current_process().name.rsplit('-', 1)[-1])
+    # Runs before the log queue is flushed on exit, so records logged while saving still reach the parent
+    multiprocessing_util.Finalize(None, save_caches, exitpriority=10)
+
+@logger.span('project', 'project')
+def process_all(input_base_dir, output_base_dir, formats, workers=None, force=False, resume=False, cpu_budget=None, executor='thread'):
+    removed = remove_temp_files(output_base_dir)
+    if removed:
+        logger.log("notice", LOG_TAG_COMPILE, "Removed temporary files left by an interrupted run:", {"Count": removed})
+
+    if executor == 'process':
+        scheduler = JobScheduler(logger, workers, cpu_budget, executor, init_worker_process, (logger.startAggregation(),))
+    else:
+        scheduler = JobScheduler(logger, workers, cpu_budget)
+    manifest = BuildManifest(output_base_dir, logger, enabled=not force, resume=resume)
     for artist in os.listdir(input_base_dir):
         artist_dir = os.path.join(input_base_dir, artist)
         if os.path.isdir(artist_dir):
-            for album in os.listdir(artist_dir):
-                album_dir = os.path.join(artist_dir, album)
-                if os.path.isdir(album_dir):
-                    process_album(artist_dir, album_dir, output_base_dir, formats)
+            with logger.span(artist, 'artist'):
+                for album in os.listdir(artist_dir):
+                    album_dir = os.path.join(artist_dir, album)
+                    if os.path.isdir(album_dir):
+                        with logger.span(album, 'album'):
+                            process_album(artist_dir, album_dir, output_base_dir, formats, scheduler, manifest)
+
+    logger.log("debug", LOG_TAG_COMPILE, "Parsed metadata files:", {"Count": metadata_cache.count_parsed})
+    logger.log("info", LOG_TAG_COMPILE, "Skipping up to date outputs:", {"Count": manifest.count_skipped})
+    try:
+        summary = scheduler.run()
+    except KeyboardInterrupt:
+        # Jobs still running in worker threads would otherwise keep their ffmpeg children alive
+        process_runner.cancel_all(wait=True)
+        raise
+    finally:
+        # Workers have exited by now; write what they logged before the summary below
+        logger.stopAggregation()
+        manifest.save()
+        save_caches()
+        if encode_cache:
+            logger.log("info", LOG_TAG_COMPILE, "Encode cache:", encode_cache.stats())
+
+    if summary["Failed"]:
+        logger.log("warn", LOG_TAG_COMPILE, "Some jobs failed:", summary)
+    else:
+        logger.log("success", LOG_TAG_COMPILE, "All jobs complete:", summary)
+    return summary
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=SCRIPT_TITLE)
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel jobs (default: project.workers, or the number of CPUs)")
+    parser.add_argument('--executor', choices=EXECUTORS, default=None, help="Run jobs on worker threads or worker processes (default: project.executor, or thread)")
+    parser.add_argument('--force', action='store_true', help="Rebuild every output, ignoring the build manifest")
+    parser.add_argument('--resume', action='store_true', help="Keep the outputs an interrupted run completed, as recorded in its journal")
+    parser.add_argument('--cache-stats', action='store_true', help="Report the size of the art and encode caches, then exit")
+    return parser.parse_args()
+
+def report_cache_stats():
+    for name, cache in (("Art", art_cache), ("Encode", encode_cache)):
+        if cache:
+            # Counters only cover the current process, so a standalone report has none to show
+            logger.log("info", LOG_TAG_COMPILE, f"{name} cache:", {"Path": cache.cache_dir, **cache.stats(counts=False)})
+        else:
+            logger.log("info", LOG_TAG_COMPILE, f"{name} cache disabled.")
 
 if __name__ == '__main__':
+    args = parse_args()
+    if args.cache_stats:
+        report_cache_stats()
+        sys.exit(0)
     input_base_dir = os.path.join(config_dir, 'in')
     output_base_dir = os.path.join(config_dir, 'out')
     formats = project_config.get('project', {}).get('formats', ['flac', 'mp3', 'ogg', 'wav'])
+    workers = resolve_worker_count(args.workers if args.workers is not None else project_config.get('project', {}).get('workers', 0))
+    cpu_budget = resolve_worker_count(project_config.get('ffmpeg', {}).get('cpu_budget', 0))
+    executor = args.executor or project_config.get('project', {}).get('executor', 'thread')
+    if executor not in EXECUTORS:
+        logger.log("warn", LOG_TAG_COMPILE, "Unknown executor, using threads:", {"Executor": executor})
+        executor = 'thread'
 
     PATHS_PROJECT = {
         "Project Path": config_dir,
         "Input": input_base_dir,
         "Output": output_base_dir,
-        "Formats": formats
+        "Formats": formats,
+        "Workers": workers,
+        "Executor": executor,
+        "CPU Budget": cpu_budget,
+        "Tagging": "ffmpeg (mutagen for the rest)" if ffmpeg_embed_tags else "mutagen"
     }
     logger.log("begin", LOG_TAG_COMPILE, 'Running:', PATHS_PROJECT)
-    process_all(input_base_dir, output_base_dir, formats)
+    try:
+        process_all(input_base_dir, output_base_dir, formats, workers, args.force, args.resume, cpu_budget, executor)
+    finally:
+        if logger.isTracing:
+            trace_path = os.path.join(DIR_ROOT, trace_settings.get("path", "_log/compile_audio.trace.json"))
+            try:
+                logger.log("info", LOG_TAG_COMPILE, "Wrote trace:", {"Path": trace_path, "Spans": logger.writeTrace(trace_path)})
+            except Exception as e:
+                logger.log("error", LOG_TAG_COMPILE, "Failed to write trace:", {"Path": trace_path, "Error": str(e)})
     logger.log("end", LOG_TAG_COMPILE, 'Complete:', PATHS_PROJECT)
@@ -2,8 +2,18 @@ import os
 import re
 import sys
 import json
+import gzip
+import queue
+import atexit
+import shutil
+import time
+import itertools
+import threading
+import multiprocessing
+from contextlib import ContextDecorator
 from datetime import datetime, UTC
 from pathlib import Path
+from functools import lru_cache, cached_property
 from cure_ansi import ANSI
 
 LOG_LEVEL = {
@@ -19,14 +29,334 @@ LOG_LEVEL = {
 LOG_TAG_LOG = '[📜 Log]'
 ansi = ANSI()
 
+ANSI_PATTERN = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+EMOJI_PATTERN = re.compile(
+    "["                     # wide unicode ranges
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "\U00002500-\U00002BEF"  # chinese characters
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "]+",
+    flags=re.UNICODE
+)
+EXTENSION_PATTERN = re.compile(r'\.[a-z0-9]+$', re.I)
+# A leading string argument made only of bracketed tags, such as '[🎵 Compile Audio] [🔊 FFmpeg]'
+TAGS_PATTERN = re.compile(r'^\s*(?:\[[^\[\]]+\]\s*)+$')
+TAG_PATTERN = re.compile(r'\[([^\[\]]+)\]')
+# Records a worker process holds until it is connected to the parent's aggregation queue
+LOG_PENDING_LIMIT = 1000
+# Per-thread context (such as the current job id) attached to forwarded records
+logContext = threading.local()
+
+def setLogJob(jobId):
+    logContext.job = jobId
+
+def getLogJob():
+    return getattr(logContext, 'job', None)
+
+# Logger that module-level spans (`logSpan`) are recorded with, set by `CureLog.enableTracing`
+tracingLog = None
+spanIds = itertools.count(1)
+
+def getLogSpan():
+    """
+    Id of the innermost span open on this thread, to pass as `parent` to spans started elsewhere.
+    """
+    spans = getattr(logContext, 'spans', None)
+    return spans[-1] if spans else None
+
+def logSpan(name, category='span', parent=None, **args):
+    return LogSpan(tracingLog, name, category, parent, args)
+
+def isChildProcess():
+    # parent_process() is only set after a spawned child has imported the main module, its name before
+    return multiprocessing.current_process().name != 'MainProcess'
+
+# Messages waiting for the writer thread; callers block (nothing is dropped) while it is full
+LOG_QUEUE_SIZE = 10000
+
+@lru_cache(maxsize=4096)
+def isPathString(input_):
+    # Log arguments repeat a lot (tags, keys, the same paths), so the decision is cached per string
+    if not input_.strip():
+        return False
+    clean = input_.split('?')[0].split('#')[0].strip()
+    if os.path.isabs(clean):
+        return True
+    if clean.startswith('./') or clean.startswith('../'):
+        return True
+    has_ext = EXTENSION_PATTERN.search(clean)
+    has_sep = '/' in clean or '\\' in clean
+    return bool(has_sep and (has_ext or clean.endswith('/')))
+
+@lru_cache(maxsize=4096)
+def normalizePathString(filePath):
+    return os.path.normpath(filePath).replace(os.sep, '/')
+
+def toJsonValue(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {str(k): toJsonValue(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [toJsonValue(item) for item in value]
+    if isinstance(value, set):
+        return sorted((toJsonValue(item) for item in value), key=str)
+    return str(value)
+
+class LogSpan(ContextDecorator):
+    """
+    Times a block (`with log.span(...)`) or every call of a function (`@log.span(...)`) as one trace event.
+
+    Spans nest through a per-thread stack; a span started on another thread or process (such as a job) is
+    attached with an explicit `parent` id from `getLogSpan`. Does nothing unless tracing is enabled.
+    """
+
+    def __init__(self, log, name, category='span', parent=None, args=None):
+        self.log = log
+        self.name = name
+        self.category = category
+        self.parent = parent
+        self.args = args or {}
+        self.id = None
+
+    def _recreate_cm(self):
+        # Used as a decorator, every call (on any thread) gets its own span
+        return LogSpan(self.log, self.name, self.category, self.parent, self.args)
+
+    def __enter__(self):
+        if not self.log or not self.log.isTracing:
+            return self
+        spans = getattr(logContext, 'spans', None)
+        if spans is None:
+            spans = logContext.spans = []
+        if self.parent is None and spans:
+            self.parent = spans[-1]
+        self.id = f"{os.getpid()}.{next(spanIds)}"
+        spans.append(self.id)
+        self.timestamp = time.time_ns() // 1000
+        self.timeStart = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, exc, traceback):
+        if self.id is None:
+            return False
+        duration = time.perf_counter() - self.timeStart
+        logContext.spans.remove(self.id)
+        args = {**toJsonValue(self.args), 'id': self.id, 'parent': self.parent}
+        if excType is not None:
+            args['error'] = excType.__name__
+        thread = threading.current_thread()
+        self.log.addSpanEvent({
+            'name': self.name,
+            'cat': self.category,
+            'ph': 'X',
+            'ts': self.timestamp,
+            'dur': round(duration * 1000000),
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': args
+        }, multiprocessing.current_process().name, thread.name)
+        return False
+
+def getAsyncSpanEvents(events):
+    """
+    Async begin/end events (each its own row in the viewer) for spans whose children ran past their end, usually
+    jobs attached by `parent` from other threads or processes. They run until the last child finishes.
+    """
+    spans = {event['args']['id']: event for event in events if event.get('ph') == 'X' and 'id' in event.get('args', {})}
+    ends = {spanId: event['ts'] + event['dur'] for spanId, event in spans.items()}
+    for event in spans.values():
+        end = event['ts'] + event['dur']
+        parent = event['args'].get('parent')
+        # An ancestor that already ends later passed that end on to its own ancestors
+        while parent in spans and ends[parent] < end:
+            ends[parent] = end
+            parent = spans[parent]['args'].get('parent')
+    asyncEvents = []
+    for spanId, event in spans.items():
+        if ends[spanId] <= event['ts'] + event['dur']:
+            continue
+        common = {'name': event['name'], 'cat': event['cat'], 'id': spanId, 'pid': event['pid'], 'tid': event['tid']}
+        asyncEvents.append({**common, 'ph': 'b', 'ts': event['ts'], 'args': event['args']})
+        asyncEvents.append({**common, 'ph': 'e', 'ts': ends[spanId]})
+    return asyncEvents
+
+class JsonlSink:
+    """
+    Appends one JSON object per line to `path`. Once the file would grow past `maxBytes`, it is rotated to
+    `path.1` (gzipped to `path.1.gz` with `compress`), older files move up one number and at most `backupCount`
+    are kept. Only written from the log writer thread.
+    """
+
+    def __init__(self, path, maxBytes=0, backupCount=5, compress=False):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        self.compress = compress
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(path, 'a', encoding='utf-8')
+        self.size = self.file.tell()
+
+    def backupPath(self, number):
+        return f"{self.path}.{number}{'.gz' if self.compress else ''}"
+
+    def write(self, text):
+        size = len(text.encode('utf-8'))
+        if self.maxBytes and self.size and self.size + size > self.maxBytes:
+            self.rotate()
+        self.file.write(text)
+        self.size += size
+
+    def rotate(self):
+        self.file.close()
+        if self.backupCount > 0:
+            for number in range(self.backupCount - 1, 0, -1):
+                if os.path.exists(self.backupPath(number)):
+                    os.replace(self.backupPath(number), self.backupPath(number + 1))
+            if self.compress:
+                with open(self.path, 'rb') as source, gzip.open(self.backupPath(1), 'wb') as dest:
+                    shutil.copyfileobj(source, dest)
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.backupPath(1))
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.size = 0
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class LogRecord:
+    """
+    One log call. The raw args are kept and the formatted text is only built when a sink first asks for it,
+    then shared by every sink that accepts the level.
+    """
+
+    def __init__(self, log, level, args, timestamp=None, worker=None, job=None, message=None, newline=None, structured=None):
+        self.log = log
+        self.level = level
+        self.args = args
+        self.timestamp = timestamp or datetime.now(UTC)
+        self.worker = worker
+        self.job = job
+        self.newline = newline if newline is not None else isinstance(args[0], str) and args[0].startswith('\n')
+        if message is not None:
+            self.message = message
+        if structured is not None:
+            self.structured = structured
+
+    @cached_property
+    def message(self):
+        args = self.args
+        if self.newline:
+            args = (args[0][1:],) + args[1:]
+        return self.log.joinArgs(*args)
+
+    @cached_property
+    def text(self):
+        source = ''
+        if self.worker is not None:
+            source = f" [👷 Worker {self.worker}{f' · Job {self.job}' if self.job is not None else ''}]"
+        initialNewline = '\n' if self.newline else ''
+        return f"{initialNewline}[{self.timestamp.isoformat()}] {self.log.logLevels[self.level]['symbol']}{source} {self.message}"
+
+    @cached_property
+    def structured(self):
+        """
+        Tags (from the leading tag arguments), plain message (the other strings and scalars) and fields (merged
+        dict arguments, other values under 'values') for the JSONL sink.
+        """
+        tags = []
+        words = []
+        fields = {}
+        values = []
+        for arg in self.args:
+            if isinstance(arg, str):
+                if not words and TAGS_PATTERN.match(arg):
+                    tags.extend(TAG_PATTERN.findall(arg))
+                else:
+                    words.append(arg.strip())
+            elif isinstance(arg, dict):
+                fields.update(toJsonValue(arg))
+            elif isinstance(arg, (int, float, bool)) or arg is None:
+                words.append(str(arg))
+            else:
+                values.append(toJsonValue(arg))
+        if values:
+            fields['values'] = values
+        return {'tags': tags, 'message': ' '.join(word for word in words if word), 'fields': fields}
+
+    def toJson(self):
+        data = {'timestamp': self.timestamp.isoformat(), 'level': self.level, **self.structured}
+        if self.worker is not None:
+            data['worker'] = self.worker
+            data['job'] = self.job
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+    def forwarded(self, worker):
+        """
+        Plain, picklable form of this record for the parent's aggregation queue.
+        """
+        return {
+            'level': self.level,
+            'timestamp': self.timestamp.isoformat(),
+            'worker': worker,
+            'job': getLogJob(),
+            'newline': self.newline,
+            'message': self.message,
+            'structured': self.structured if self.log.isJsonlEnabled else None
+        }
+
+    @classmethod
+    def fromForwarded(cls, log, data):
+        return cls(
+            log, data['level'], (), datetime.fromisoformat(data['timestamp']),
+            data['worker'], data['job'], data['message'], data['newline'], data.get('structured')
+        )
+
 class CureLog:
-    def __init__(self, logFilePath, logLevelConsole=LOG_LEVEL['DETAIL'], logLevelFile=LOG_LEVEL['ALL']):
+    def __init__(self, logFilePath, logLevelConsole=LOG_LEVEL['DETAIL'], logLevelFile=LOG_LEVEL['ALL'], logQueueSize=LOG_QUEUE_SIZE):
         self.logFilePath = logFilePath
         self.isDebugSelf = False
 
-        logDir = Path(logFilePath).parent
-        logDir.mkdir(parents=True, exist_ok=True)
-        Path(logFilePath).write_text('', encoding='utf-8')
+        # In a worker process the parent owns the log file and console; records are forwarded to it instead
+        self.isWorker = isChildProcess()
+        self.forwardQueue = None
+        self.workerId = None
+        self.pendingRecords = []
+        self.aggregationQueue = None
+        self.aggregator = None
+        self.jsonlSink = None
+        self.isJsonlEnabled = False
+        self.currentLogLevelJsonl = LOG_LEVEL['ALL']
+        self.isTracing = False
+        self.spanEvents = []
+        self.spanLock = threading.Lock()
+        self.traceNames = {}
+
+        if self.isWorker:
+            self.logFile = None
+            self.isClosed = True
+        else:
+            logDir = Path(logFilePath).parent
+            logDir.mkdir(parents=True, exist_ok=True)
+            Path(logFilePath).write_text('', encoding='utf-8')
+
+            # One handle for the whole run, written by a background thread so callers never wait on disk
+            self.logFile = open(logFilePath, 'a', encoding='utf-8')
+            self.logQueue = queue.Queue(maxsize=logQueueSize)
+            self.logWriter = threading.Thread(target=self.writeLoop, name='cure-log-writer', daemon=True)
+            self.logWriter.start()
+            self.isClosed = False
+            atexit.register(self.close)
 
         self.currentLogLevelConsole = logLevelConsole
         self.currentLogLevelFile = logLevelFile
@@ -78,25 +408,13 @@ class CureLog:
 
     def print_safe(self, text):
         if not self.use_unicode:
-            emoji_pattern = re.compile(
-                "["                     # wide unicode ranges
-                "\U0001F600-\U0001F64F"  # emoticons
-                "\U0001F300-\U0001F5FF"  # symbols & pictographs
-                "\U0001F680-\U0001F6FF"  # transport & map
-                "\U0001F1E0-\U0001F1FF"  # flags
-                "\U00002500-\U00002BEF"  # chinese characters
-                "\U00002702-\U000027B0"
-                "\U000024C2-\U0001F251"
-                "]+",
-                flags=re.UNICODE
-            )
-            print(emoji_pattern.sub('', text))
+            print(EMOJI_PATTERN.sub('', text))
             return
         
         print(text)
 
     def ansiRemove(self, input_):
-        return re.sub(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])', '', input_)
+        return ANSI_PATTERN.sub('', input_)
 
     def getLogFile(self):
         return self.logFilePath
@@ -107,23 +425,24 @@ class CureLog:
         self.print_safe(f"{ansi.bc['bg']['green']}{ansi.fg['black']}📜🐛 [Log Debug] {args}{ansi.reset}")
 
     def isPath(self, input_):
-        if not isinstance(input_, str) or not input_.strip():
+        if not isinstance(input_, str):
             return False
-        clean = input_.split('?')[0].split('#')[0].strip()
-        if os.path.isabs(clean):
-            return True
-        if clean.startswith('./') or clean.startswith('../'):
-            return True
-        has_ext = re.search(r'\.[a-z0-9]+$', clean, re.I)
-        has_sep = '/' in clean or '\\' in clean
-        return has_sep and (has_ext or clean.endswith('/'))
+        return isPathString(input_)
 
     def normalizePath(self, filePath):
-        return os.path.normpath(filePath).replace(os.sep, '/')
+        return normalizePathString(filePath)
 
     def formatArg(self, arg, indentLevel=0, tagParent='', maxDepth=16):
         if indentLevel > maxDepth:
             return '<[[ANSI_OFF]]Max Depth Reached[[ANSI_ON]]>'
+        # Strings are by far the most common argument, decide them before the container checks
+        if type(arg) is str:
+            if isPathString(arg):
+                return f'"[[ANSI_OFF]]{normalizePathString(arg)}[[ANSI_ON]]"'
+            if tagParent not in ('ARRAY', 'OBJECT', 'SET'):
+                return arg
+            return f'"[[ANSI_OFF]]{json.dumps(arg)[1:-1]}[[ANSI_ON]]"'
+
         indent = '  ' * indentLevel
 
         if isinstance(arg, list):
@@ -165,9 +484,118 @@ class CureLog:
         else:
             raise ValueError(f"Invalid debug level: {level}")
 
-    def writeToLogFile(self, logMessage):
-        with open(self.logFilePath, "a", encoding="utf-8") as f:
-            f.write(self.ansiRemove(logMessage).replace('[[ANSI_OFF]]', '').replace('[[ANSI_ON]]', '') + '\n')
+    def writeToLogFile(self, logMessage, flush=False):
+        if '\x1b' in logMessage:
+            logMessage = self.ansiRemove(logMessage)
+        line = logMessage.replace('[[ANSI_OFF]]', '').replace('[[ANSI_ON]]', '') + '\n'
+        if self.isClosed:
+            with open(self.logFilePath, "a", encoding="utf-8") as f:
+                f.write(line)
+            return
+        self.logQueue.put(line)
+        if flush:
+            self.flush()
+
+    def writeLoop(self):
+        while True:
+            lines = [self.logQueue.get()]
+            # Drain whatever else is queued so a burst becomes one write and one flush
+            while len(lines) < 1000:
+                try:
+                    lines.append(self.logQueue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in lines
+            while stop:
+                # Messages that raced with close() still go out before the handle is closed
+                try:
+                    lines.append(self.logQueue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.logFile.write(''.join(line for line in lines if type(line) is str))
+                for line in lines:
+                    if type(line) is tuple:
+                        line[0].write(line[1])
+                if stop or self.logQueue.empty():
+                    self.logFile.flush()
+                    if self.jsonlSink:
+                        self.jsonlSink.flush()
+            except Exception as e:
+                print(f"{LOG_TAG_LOG} Failed to write log file: {e}", file=sys.stderr)
+            for _ in lines:
+                self.logQueue.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """
+        Block until every message queued so far is written and flushed to the log file.
+        """
+        if not self.isClosed:
+            self.logQueue.join()
+
+    def close(self):
+        if self.isClosed:
+            return
+        self.isClosed = True
+        self.logQueue.put(None)
+        self.logWriter.join()
+        self.logFile.close()
+        if self.jsonlSink:
+            self.jsonlSink.close()
+
+    def enableTracing(self):
+        """
+        Record spans (see `span`) for `writeTrace`. Also makes this the logger for module-level `logSpan` calls.
+        """
+        global tracingLog
+        self.isTracing = True
+        tracingLog = self
+
+    def span(self, name, category='span', parent=None, **args):
+        return LogSpan(self, name, category, parent, args)
+
+    def addSpanEvent(self, event, processName, threadName):
+        if self.isWorker:
+            self.forwardRecord(None, {'span': event, 'process': processName, 'thread': threadName})
+            return
+        with self.spanLock:
+            self.spanEvents.append(event)
+            self.traceNames[(event['pid'], event['tid'])] = (processName, threadName)
+
+    def writeTrace(self, path):
+        """
+        Write the recorded spans as a Chrome trace-event file (chrome://tracing, Perfetto), plus async spans that
+        cover the jobs queued under each span (see `getAsyncSpanEvents`). Returns the span count.
+        """
+        with self.spanLock:
+            events = list(self.spanEvents)
+            names = dict(self.traceNames)
+        processNames = {pid: processName for (pid, _), (processName, _) in names.items()}
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': processName}} for pid, processName in processNames.items()]
+        for (pid, tid), (_, threadName) in names.items():
+            metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': threadName}})
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        pathTemp = path + '.tmp'
+        with open(pathTemp, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + sorted(events + getAsyncSpanEvents(events), key=lambda event: event['ts']), 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        os.replace(pathTemp, path)
+        return len(events)
+
+    def enableJsonl(self, path, maxBytes=0, backupCount=5, compress=False, logLevel=LOG_LEVEL['ALL']):
+        """
+        Also write records as JSON lines to `path`, appending across runs and rotating by size (see `JsonlSink`).
+        In a worker process this only makes forwarded records carry their structured form.
+        """
+        self.currentLogLevelJsonl = logLevel
+        if not self.isWorker and not self.isClosed:
+            try:
+                self.jsonlSink = JsonlSink(path, maxBytes, backupCount, compress)
+            except OSError as e:
+                self.log('error', LOG_TAG_LOG, 'Failed to open JSONL log:', {'Path': path, 'Error': str(e)})
+                return
+        self.isJsonlEnabled = True
 
     def prefixTimestamp(self, *args):
         timestamp = datetime.now(UTC).isoformat()
@@ -192,33 +620,89 @@ class CureLog:
         if not logLevel:
             raise ValueError(f"Invalid log level: {level}")
 
-        if logLevel["level"] > self.currentLogLevelConsole and logLevel["level"] > self.currentLogLevelFile:
+        if logLevel["level"] > self.currentLogLevelConsole and logLevel["level"] > self.currentLogLevelFile and (not self.isJsonlEnabled or logLevel["level"] > self.currentLogLevelJsonl):
             return
 
-        initialNewline = ''
-        if isinstance(args[0], str) and args[0].startswith('\n'):
-            initialNewline = '\n'
-            args = (args[0][1:],) + args[1:]
-
-        formattedArgs = self.joinArgs(*args)
-        logMessage = self.prefixTimestamp(f"{logLevel['symbol']} {formattedArgs}")
-        logMessage = initialNewline + logMessage
-
-        if logLevel["level"] <= self.currentLogLevelFile:
-            self.writeToLogFile(logMessage)
-
-        if logLevel["level"] > self.currentLogLevelConsole:
+        record = LogRecord(self, level, args)
+        if self.isWorker:
+            self.forwardRecord(record)
             return
-
+        self.emit(record)
+
+    def emit(self, record):
+        levelValue = self.logLevels[record.level]["level"]
+
+        if self.jsonlSink and not self.isClosed and levelValue <= self.currentLogLevelJsonl:
+            self.logQueue.put((self.jsonlSink, record.toJson() + '\n'))
+
+        if levelValue <= self.currentLogLevelFile:
+            self.writeToLogFile(record.text, flush=levelValue <= LOG_LEVEL['ERROR'])
+
+        if levelValue <= self.currentLogLevelConsole:
+            self.consoleMethod(record.level)(self.formatConsole(record.level, record.text))
+
+    def startAggregation(self):
+        """
+        Parent side of multi-process logging. Returns a queue to hand to worker processes (see `forwardTo`);
+        their records are written by this logger in the order they arrive, tagged with worker and job id.
+        """
+        if self.aggregationQueue is None:
+            self.aggregationQueue = multiprocessing.get_context('spawn').Queue()
+            self.aggregator = threading.Thread(target=self.aggregateLoop, name='cure-log-aggregator', daemon=True)
+            self.aggregator.start()
+        return self.aggregationQueue
+
+    def aggregateLoop(self):
+        while True:
+            data = self.aggregationQueue.get()
+            if data is None:
+                return
+            try:
+                if 'span' in data:
+                    self.addSpanEvent(data['span'], data['process'], data['thread'])
+                    continue
+                self.emit(LogRecord.fromForwarded(self, data))
+            except Exception as e:
+                print(f"{LOG_TAG_LOG} Failed to write forwarded record: {e}", file=sys.stderr)
+
+    def stopAggregation(self):
+        """
+        Write every record the workers sent before this call, then stop the aggregator. Call after the workers exited.
+        """
+        if self.aggregationQueue is None:
+            return
+        self.aggregationQueue.put(None)
+        self.aggregator.join()
+        self.aggregationQueue = None
+        self.aggregator = None
+
+    def forwardTo(self, aggregationQueue, workerId):
+        """
+        Worker side of multi-process logging: send records to the parent's aggregation queue, including
+        those logged before the queue was known (such as while the worker imported its modules).
+        """
+        self.forwardQueue = aggregationQueue
+        self.workerId = workerId
+        pending, self.pendingRecords = self.pendingRecords, []
+        for data in pending:
+            data['worker'] = workerId
+            self.forwardQueue.put(data)
+
+    def forwardRecord(self, record, data=None):
+        if data is None:
+            data = record.forwarded(self.workerId)
+        if self.forwardQueue is not None:
+            self.forwardQueue.put(data)
+        elif len(self.pendingRecords) < LOG_PENDING_LIMIT:
+            self.pendingRecords.append(data)
+
+    def formatConsole(self, level, logMessage):
         lines = logMessage.split('\n')
         if len(lines) > 1 and self.ansiCodesFollow(level):
             formatted = [ansi.format(self.ansiCodes(level), lines[0])]
             formatted += [ansi.format(self.ansiCodesFollow(level), ln) for ln in lines[1:]]
-            logMessage = '\n'.join(formatted)
-        else:
-            logMessage = ansi.format(self.ansiCodes(level), logMessage)
-
-        self.consoleMethod(level)(logMessage)
+            return '\n'.join(formatted)
+        return ansi.format(self.ansiCodes(level), logMessage)
 
     def custom(self, ansiCode, *args):
         msg = self.prefixTimestamp("[Custom] " + self.joinArgs(*args))